@@ -1,44 +1,95 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime
-from sklearn.linear_model import LinearRegression
 import numpy as np
+from scanner import iter_scandir
+from walker import parallel_reduce
+from file_table import FileTable
 
-def scan_directory(base_path):
-    """Scans directory and returns a DataFrame with file info."""
-    data = []
-    for root, dirs, files in os.walk(base_path):
-        for f in files:
-            try:
-                path = os.path.join(root, f)
-                size = os.path.getsize(path) / (1024 * 1024)  # MB
-                ext = os.path.splitext(f)[1].lower()
-                created = datetime.fromtimestamp(os.path.getctime(path))
-                data.append([f, path, size, ext, created])
-            except Exception:
-                continue
-    df = pd.DataFrame(data, columns=["Name", "Path", "Size_MB", "Extension", "Created_At"])
-    return df
+def scan_directory(base_path, workers=None, with_names=True, with_paths=True):
+    """
+    Scans directory and returns a DataFrame with file info.
+    base_path may be a single folder or a list of folders; workers > 1
+    walks them on the shared parallel walker. Files are collected into a
+    columnar FileTable which the DataFrame wraps without copying.
+    Name and Path are included as before; pass with_names=False,
+    with_paths=False for a leaner frame when only the analytics are needed.
+    """
+    roots = [base_path] if isinstance(base_path, (str, os.PathLike)) else list(base_path)
+    if workers and workers > 1:
+        table = parallel_reduce(roots, FileTable, workers)
+    else:
+        table = FileTable()
+        for root in roots:
+            for entry in iter_scandir(root):
+                table.add(*entry)
+    return table.to_dataframe(with_names=with_names, with_paths=with_paths)
+
+def _codes(column):
+    """Integer codes and labels for a column (free for categoricals)."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    codes, labels = pd.factorize(column)
+    return codes, labels
+
+def _folder_column(df):
+    if 'Folder' in df:
+        return df['Folder']
+    # strip the last path component without touching df
+    return df['Path'].str.replace(r'[\\/][^\\/]*$', '', regex=True)
+
+def _month_counts(df):
+    """File counts per creation month, as (PeriodIndex, counts)."""
+    months = df['Created_At'].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    unique_months, counts = np.unique(months, return_counts=True)
+    return pd.DatetimeIndex(unique_months).to_period('M'), counts
 
 def get_file_type_distribution(df):
-    return df['Extension'].value_counts()
+    codes, labels = _codes(df['Extension'])
+    counts = np.bincount(codes, minlength=len(labels))
+    dist = pd.Series(counts, index=labels, name='count')
+    return dist[dist > 0].sort_values(ascending=False, kind='stable')
+
+def get_category_distribution(df):
+    """Total size (MB) per category from the shared classifier."""
+    codes, labels = _codes(df['Category'])
+    sizes = np.bincount(codes, weights=df['Size_MB'].to_numpy(), minlength=len(labels))
+    return pd.Series(sizes, index=labels, name='Size_MB').sort_values(ascending=False)
 
 def get_folder_size_distribution(df):
-    df['Folder'] = df['Path'].apply(lambda x: os.path.dirname(x))
-    return df.groupby('Folder')['Size_MB'].sum().sort_values(ascending=False)
+    codes, labels = _codes(_folder_column(df))
+    sizes = np.bincount(codes, weights=df['Size_MB'].to_numpy(), minlength=len(labels))
+    present = np.bincount(codes, minlength=len(labels)) > 0
+    dist = pd.Series(sizes[present], index=labels[present], name='Size_MB')
+    dist.index.name = 'Folder'
+    return dist.sort_values(ascending=False)
 
-def get_file_growth_over_time(df):
-    df['Month'] = df['Created_At'].dt.to_period('M')
-    return df.groupby('Month').size()
+def get_file_growth_over_time(df, month_counts=None):
+    months, counts = month_counts if month_counts is not None else _month_counts(df)
+    return pd.Series(counts, index=months.rename('Month'))
 
-def forecast_storage_growth(df):
+def forecast_storage_growth(df, month_counts=None):
     """Predicts future file growth (simple linear regression)."""
-    df['Timestamp'] = df['Created_At'].map(datetime.timestamp)
-    monthly = df.groupby(df['Created_At'].dt.to_period('M')).size().reset_index(name='Count')
+    # scikit-learn is slow to import and only needed here
+    from sklearn.linear_model import LinearRegression
+    months, counts = month_counts if month_counts is not None else _month_counts(df)
+    monthly = pd.DataFrame({'Created_At': months, 'Count': counts})
     monthly['MonthNum'] = np.arange(len(monthly))
     model = LinearRegression()
-    model.fit(monthly[['MonthNum']], monthly['Count'])
+    model.fit(monthly[['MonthNum']].to_numpy(), monthly['Count'])
     future = np.arange(len(monthly), len(monthly) + 3)
     prediction = model.predict(future.reshape(-1, 1))
     return monthly, prediction
+
+def compute_all(df):
+    """
+    Every dashboard metric in one pass over the frame: extension/folder codes
+    and creation months are computed once and shared. df is not modified.
+    """
+    month_counts = _month_counts(df)
+    return {
+        "file_types": get_file_type_distribution(df),
+        "categories": get_category_distribution(df),
+        "folder_sizes": get_folder_size_distribution(df),
+        "growth": get_file_growth_over_time(df, month_counts),
+        "forecast": forecast_storage_growth(df, month_counts) if len(month_counts[1]) else None
+    }
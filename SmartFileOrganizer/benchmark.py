@@ -0,0 +1,265 @@
+# benchmark.py
+"""
+Benchmarks on reproducible synthetic trees.
+
+    python benchmark.py                      # default scales, compare to baseline
+    python benchmark.py --scales 1000 50000  # custom scales
+    python benchmark.py --save-baseline      # store this run as the new baseline
+
+Every scale gets a fresh tree in a temp dir; each benchmark is timed once
+plainly and once more under tracemalloc for peak memory (tracing slows
+Python down, so the two are kept apart). Exits with status 1 when a
+benchmark is slower or hungrier than the baseline by more than --tolerance.
+"""
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+
+from config import CATEGORIES
+
+BASELINE_FILE = "benchmark_baseline.json"
+DEFAULT_SCALES = [1000, 10000]
+TOLERANCE = 0.25          # allowed slowdown / memory growth before flagging
+
+# default extension mix: every configured extension, plus unknown and none
+DEFAULT_EXTENSIONS = {ext: 1.0 for exts in CATEGORIES.values() for ext in exts}
+DEFAULT_EXTENSIONS.update({".xyz": 2.0, "": 1.0})
+
+
+def generate_tree(root, files, depth=3, fanout=4, size_median=4096, size_sigma=1.5,
+                  max_size=4 * 1024 * 1024, extensions=None, duplicate_ratio=0.1, seed=42):
+    """
+    Create `files` files under root, spread over a tree of folders `depth`
+    levels deep with `fanout` subfolders each. Sizes are log-normal around
+    size_median (capped at max_size); extensions are drawn from the
+    {ext: weight} mix; duplicate_ratio of the files copy the content of an
+    earlier file. The same arguments always give the same tree.
+    Returns {"files", "dirs", "bytes", "duplicates"}.
+    """
+    rng = random.Random(seed)
+    extensions = extensions or DEFAULT_EXTENSIONS
+    ext_names, ext_weights = list(extensions), list(extensions.values())
+
+    dirs = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, f"dir{d}_{i}") for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    for folder in dirs:
+        os.makedirs(folder, exist_ok=True)
+
+    # one random block sliced per file keeps generation fast; a per-file
+    # header keeps files with the same size from being accidental duplicates
+    block = rng.randbytes(max_size) if hasattr(rng, "randbytes") else os.urandom(max_size)
+    written = []
+    total = duplicates = 0
+    for i in range(files):
+        folder = dirs[rng.randrange(len(dirs))]
+        ext = rng.choices(ext_names, ext_weights)[0]
+        path = os.path.join(folder, f"file_{i:07d}{ext}")
+        if written and rng.random() < duplicate_ratio:
+            shutil.copyfile(written[rng.randrange(len(written))], path)
+            duplicates += 1
+            total += os.path.getsize(path)
+            continue
+        size = min(max_size, max(0, int(rng.lognormvariate(0, size_sigma) * size_median)))
+        header = f"{i}\n".encode()
+        offset = rng.randrange(max_size - size + 1)
+        with open(path, "wb") as f:
+            f.write((header + block[offset:offset + size])[:size])
+        written.append(path)
+        total += size
+    return {"files": files, "dirs": len(dirs), "bytes": total, "duplicates": duplicates}
+
+
+def _measure(fn, trace):
+    """(seconds, peak bytes or None, result) for one call of fn."""
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        seconds = time.perf_counter() - start
+        peak = None
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return seconds, peak, result
+
+
+def _quiet(fn):
+    """Call fn with its prints swallowed (undo prints a summary)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+
+def _organize(tree):
+    from file_organizer import organize_directory
+    for event in organize_directory(tree, recursive=True):
+        pass
+
+
+def _undo():
+    from history_store import undo_last_operation
+    _quiet(undo_last_operation)
+
+
+def _scan(tree, processes=None):
+    from scanner import FolderScanner
+    FolderScanner(tree).scan(processes=processes)
+
+
+def _analytics(tree):
+    from analytics import scan_directory
+    scan_directory(tree, with_names=False, with_paths=False)
+
+
+def _save_history(moves):
+    from history_store import save_history
+    save_history(str(uuid.uuid4()), moves)
+
+
+def warm_imports():
+    """Import everything up front so import time is not charged to the first scale."""
+    import file_organizer, history_store, scanner  # noqa: F401
+    try:
+        import analytics  # noqa: F401
+    except ImportError:
+        pass
+
+
+def run_scale(files, workdir, tree_options):
+    """Run every benchmark on a fresh tree of `files` files; {name: result}."""
+    tree = os.path.join(workdir, f"tree_{files}")
+    info = generate_tree(tree, files, **tree_options)
+    moves = [{"from": os.path.join(tree, f"a_{i}.txt"), "to": os.path.join(tree, "Documents", f"a_{i}.txt")}
+             for i in range(files)]
+
+    # organize then undo puts the tree back, so the pair can run twice
+    steps = [
+        ("scan", lambda: _scan(tree)),
+        ("scan (processes)", lambda: _scan(tree, os.cpu_count())),
+        ("analytics.scan_directory", lambda: _analytics(tree)),
+        ("organize_directory", lambda: _organize(tree)),
+        ("undo_last_operation", _undo),
+        ("save_history", lambda: _save_history(moves)),
+    ]
+    results = {}
+    for trace in (False, True):
+        for name, fn in steps:
+            try:
+                seconds, peak, _ = _measure(fn, trace)
+            except ImportError as e:
+                # e.g. analytics without pandas installed
+                results[name] = {"skipped": str(e)}
+                continue
+            entry = results.setdefault(name, {})
+            if trace:
+                entry["peak_mb"] = round(peak / (1024 * 1024), 3)
+            else:
+                entry["seconds"] = round(seconds, 4)
+                entry["files_per_s"] = round(files / seconds) if seconds else None
+                if name in ("scan", "scan (processes)", "analytics.scan_directory"):
+                    entry["mb_per_s"] = round(info["bytes"] / (1024 * 1024) / seconds, 1) if seconds else None
+    return info, results
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """Regressions of current vs baseline results: [message]."""
+    problems = []
+    for scale, benches in current.items():
+        for name, result in benches.items():
+            base = baseline.get(scale, {}).get(name)
+            if not base or "seconds" not in result or "seconds" not in base:
+                continue
+            if result["seconds"] > base["seconds"] * (1 + tolerance):
+                problems.append(f"{name} @ {scale} files: {result['seconds']:.3f}s vs {base['seconds']:.3f}s")
+            if result.get("peak_mb") and base.get("peak_mb") and result["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+                problems.append(f"{name} @ {scale} files: {result['peak_mb']:.1f} MB vs {base['peak_mb']:.1f} MB peak")
+    return problems
+
+
+def print_report(scale, info, results, baseline):
+    print(f"\n{scale:,} files, {info['dirs']:,} folders, {info['bytes'] / (1024 * 1024):.1f} MB, "
+          f"{info['duplicates']:,} duplicates")
+    print(f"  {'benchmark':<26}{'seconds':>10}{'files/s':>12}{'peak MB':>10}{'vs base':>10}")
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"  {name:<26}  skipped: {result['skipped']}")
+            continue
+        base = baseline.get(str(scale), {}).get(name, {})
+        change = f"{result['seconds'] / base['seconds'] - 1:+.0%}" if base.get("seconds") else "-"
+        print(f"  {name:<26}{result['seconds']:>10.3f}{result['files_per_s'] or 0:>12,}"
+              f"{result.get('peak_mb', 0):>10.1f}{change:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SmartFileOrganizer on synthetic trees.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="file counts to test")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--size-median", type=int, default=4096, help="median file size in bytes")
+    parser.add_argument("--size-sigma", type=float, default=1.5, help="log-normal spread of file sizes")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--output", help="also write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    baseline_path = os.path.abspath(args.baseline)
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    tree_options = {"depth": args.depth, "fanout": args.fanout, "size_median": args.size_median,
+                    "size_sigma": args.size_sigma, "duplicate_ratio": args.duplicate_ratio, "seed": args.seed}
+    warm_imports()
+    current = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="sfo_bench_") as workdir:
+        # history, journal and cache files land in the temp dir, not the real ones
+        os.chdir(workdir)
+        try:
+            for scale in args.scales:
+                info, results = run_scale(scale, workdir, tree_options)
+                print_report(scale, info, results, baseline)
+                current[str(scale)] = results
+        finally:
+            os.chdir(cwd)
+
+    report = {"python": platform.python_version(), "platform": platform.platform(),
+              "tree": tree_options, "results": current}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {baseline_path}")
+        return 0
+
+    problems = compare(current, baseline, args.tolerance)
+    if problems:
+        print("\nRegressions:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# classifier.py
+import os
+import re
+import time
+import fnmatch
+from config import CATEGORIES, DEFAULT_CATEGORY, CUSTOM_RULES
+
+
+class Classifier:
+    """
+    File classifier compiled once from config.
+
+    - extensions (including compound ones such as ".tar.gz") go into a dict,
+      so the lookup costs the same for 10 or 1000 configured extensions;
+    - glob/regex rules on the file name are compiled once each and tried in
+      order (not merged: each user regex keeps its own flags and groups);
+    - rules with size/age conditions are checked in order, before the others.
+    """
+
+    def __init__(self, categories=None, default=DEFAULT_CATEGORY, rules=None):
+        categories = CATEGORIES if categories is None else categories
+        rules = CUSTOM_RULES if rules is None else rules
+        self.default = default
+        self.by_ext = {}
+        for category, extensions in categories.items():
+            for ext in extensions:
+                # first category listing an extension wins, as before
+                self.by_ext.setdefault(ext.lower(), category)
+
+        self.conditional_rules = []
+        self.name_rules = []
+        for rule in rules:
+            compiled = _compile_rule(rule)
+            if compiled["min_size"] is None and compiled["max_size"] is None \
+                    and compiled["older_than"] is None and compiled["newer_than"] is None:
+                if compiled["pattern"] is None and compiled["extensions"]:
+                    for ext in compiled["extensions"]:
+                        self.by_ext[ext] = rule["category"]
+                    continue
+                if compiled["extensions"] is None:
+                    self.name_rules.append((compiled["pattern"].fullmatch, rule["category"]))
+                    continue
+            self.conditional_rules.append(compiled)
+        self.needs_stat = bool(self.conditional_rules)
+
+        # every extension extension() should recognise, compound ones included
+        self.known_extensions = set(self.by_ext)
+        for rule in self.conditional_rules:
+            self.known_extensions.update(rule["extensions"] or ())
+        self.max_parts = max((ext.count('.') for ext in self.known_extensions), default=1)
+
+    def _suffixes(self, name):
+        """Extensions of name, longest (compound) first; at most max_parts."""
+        stem, ext = os.path.splitext(name.lower())
+        if not ext:
+            return []
+        suffixes = [ext]
+        for _ in range(self.max_parts - 1):
+            stem, inner = os.path.splitext(stem)
+            if not inner:
+                break
+            suffixes.append(inner + suffixes[-1])
+        suffixes.reverse()
+        return suffixes
+
+    def extension(self, name):
+        """Longest configured (possibly compound) extension of name, else its plain extension."""
+        suffixes = self._suffixes(name)
+        for suffix in suffixes:
+            if suffix in self.known_extensions:
+                return suffix
+        return suffixes[-1] if suffixes else ""
+
+    def category_names(self):
+        """Every category this classifier can return."""
+        names = set(self.by_ext.values())
+        names.update(category for _, category in self.name_rules)
+        names.update(rule["category"] for rule in self.conditional_rules)
+        names.add(self.default)
+        return names
+
+    def category_for_extension(self, ext):
+        return self.by_ext.get(ext.lower(), self.default)
+
+    def classify(self, name, size=None, mtime=None, default=True):
+        """
+        Category for a file name (size in bytes and mtime as a timestamp are
+        only used by conditional rules). With default=False, returns None
+        when nothing matched instead of the default category.
+        """
+        if self.conditional_rules:
+            now = time.time()
+            ext = self.extension(name)
+            for rule in self.conditional_rules:
+                if _matches(rule, name, ext, size, mtime, now):
+                    return rule["category"]
+        for fullmatch, category in self.name_rules:
+            if fullmatch(name):
+                return category
+        for suffix in self._suffixes(name):
+            category = self.by_ext.get(suffix)
+            if category is not None:
+                return category
+        return self.default if default else None
+
+
+_CONDITIONS = ("glob", "regex", "extensions", "min_size", "max_size", "older_than_days", "newer_than_days")
+
+
+def _compile_rule(rule):
+    if not isinstance(rule, dict) or not rule.get("category"):
+        raise ValueError(f"Classification rule needs a category: {rule!r}")
+    if not any(rule.get(key) not in (None, "", [], ()) for key in _CONDITIONS):
+        raise ValueError(f"Classification rule for {rule['category']!r} has no glob, regex, "
+                         f"extensions or size/age condition: {rule!r}")
+    pattern = None
+    try:
+        if "glob" in rule:
+            pattern = re.compile(fnmatch.translate(rule["glob"]), re.IGNORECASE)
+        elif "regex" in rule:
+            pattern = re.compile(rule["regex"], re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid pattern in classification rule for {rule['category']!r}: {e}") from None
+    extensions = rule.get("extensions")
+    day = 86400
+    return {
+        "category": rule["category"],
+        "pattern": pattern,
+        "extensions": {e.lower() for e in extensions} if extensions else None,
+        "min_size": rule.get("min_size"),
+        "max_size": rule.get("max_size"),
+        "older_than": rule["older_than_days"] * day if "older_than_days" in rule else None,
+        "newer_than": rule["newer_than_days"] * day if "newer_than_days" in rule else None,
+    }
+
+
+def _matches(rule, name, ext, size, mtime, now):
+    if rule["extensions"] is not None and ext not in rule["extensions"]:
+        return False
+    if rule["pattern"] is not None and not rule["pattern"].fullmatch(name):
+        return False
+    if rule["min_size"] is not None and (size is None or size < rule["min_size"]):
+        return False
+    if rule["max_size"] is not None and (size is None or size > rule["max_size"]):
+        return False
+    if rule["older_than"] is not None and (mtime is None or now - mtime < rule["older_than"]):
+        return False
+    if rule["newer_than"] is not None and (mtime is None or now - mtime > rule["newer_than"]):
+        return False
+    return True
+
+
+_default = None
+
+
+def get_classifier():
+    """Shared classifier built from config (compiled on first use)."""
+    global _default
+    if _default is None:
+        _default = Classifier()
+    return _default
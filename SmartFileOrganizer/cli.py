@@ -0,0 +1,262 @@
+# cli.py
+"""
+Headless command line for SmartFileOrganizer.
+
+    python cli.py organize PATH [--recursive] [--exclude PATTERN ...]
+    python cli.py scan PATH [--incremental] [--workers N] [--processes N] [--export FILE]
+    python cli.py undo [RUN_ID] [--match PATTERN] [--list]
+    python cli.py analyze PATH
+    python cli.py dedupe PATH [--min-size BYTES]
+
+Only the standard library and light local modules are imported up front;
+each command imports what it needs, so organize/undo never load pandas or
+scikit-learn.
+"""
+import os
+import sys
+import json
+import argparse
+
+from config import SCAN_PROCESSES, SCAN_TOP_K, SCAN_WORKERS
+from mover import COPY_WORKERS
+from event_log import LOG_FOLDER, configure_logging
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def _print_json(data):
+    print(json.dumps(data, indent=2, default=str))
+
+
+def cmd_organize(args):
+    from file_organizer import organize_directory
+
+    counts = {"moved": 0, "skipped": 0, "error": 0}
+    done = None
+    for event in organize_directory(args.path, workers=args.workers, recursive=args.recursive,
+                                    max_depth=args.max_depth, exclude=args.exclude):
+        status = event["status"]
+        if status in counts:
+            counts[status] += 1
+        if status == "done":
+            done = event
+        elif status == "error":
+            print(f"error: {event.get('file', args.path)}: {event['message']}", file=sys.stderr)
+        elif status == "warning":
+            print(event["message"], file=sys.stderr)
+        elif args.verbose and status == "moved":
+            print(f"moved {event['file']} -> {event['category']}")
+        elif args.verbose and status == "skipped":
+            print(f"skipped {event['file']} ({event['reason']})")
+    if args.json:
+        _print_json(done or counts)
+    else:
+        run = f" (run {done['run_id']})" if done else ""
+        print(f"Moved {counts['moved']}, skipped {counts['skipped']}, errors {counts['error']}{run}")
+    return 1 if counts["error"] else 0
+
+
+def cmd_scan(args):
+    from scanner import FolderScanner
+
+    scanner = FolderScanner(args.path, top_k=args.top_k)
+    if args.processes > 1 and (args.incremental or args.export):
+        print("--processes cannot be combined with --incremental or --export", file=sys.stderr)
+        return 2
+    exporter = None
+    if args.export:
+        from scan_export import ScanExporter
+        exporter = ScanExporter(args.export)
+    try:
+        results = scanner.scan(incremental=args.incremental, workers=args.workers, processes=args.processes,
+                               exporter=exporter)
+    finally:
+        if exporter is not None:
+            exporter.close()
+    if args.json:
+        _print_json(results)
+        return 0
+    print(f"{results['total_files']:,} files in {results['total_folders']:,} folders, "
+          f"{scanner.format_size(results['total_size'])} ({results['scan_time']:.2f}s)")
+    for category, info in sorted(results["categories"].items(), key=lambda kv: -kv[1]["size"]):
+        print(f"  {category:<12}{info['count']:>10,} files {scanner.format_size(info['size']):>12}")
+    if results["largest_files"]:
+        print("Largest files:")
+        for f in results["largest_files"][:args.top]:
+            print(f"  {f['size_formatted']:>12}  {f['path']}")
+    if "delta" in results:
+        delta = results["delta"]
+        print(f"Changes: {len(delta['added'])} added, {len(delta['removed'])} removed, "
+              f"{len(delta['modified'])} modified")
+    if "export" in results:
+        print(f"File list: {results['export']['rows']:,} rows written to {results['export']['path']}")
+    return 0
+
+
+def cmd_undo(args):
+    import fnmatch
+    from history_store import load_history_index, undo_run
+
+    if args.list:
+        runs = list(load_history_index().values())[-args.limit:]
+        if args.json:
+            _print_json(runs)
+            return 0
+        for run in runs:
+            flag = " (undone)" if run["undone"] else ""
+            print(f"{run['run_id']}  {run['timestamp'][:19]}  {run['moves']:>8,} files{flag}")
+        return 0
+
+    select = None
+    if args.match:
+        select = lambda move: any(fnmatch.fnmatch(move["from"], p) or
+                                  fnmatch.fnmatch(move["from"].replace("\\", "/").rsplit("/", 1)[-1], p)
+                                  for p in args.match)
+    errors = 0
+    result = None
+    for event in undo_run(args.run_id, select=select, workers=args.workers):
+        if event["status"] == "error":
+            errors += 1
+            print(f"error: {event['file']}: {event['message']}", file=sys.stderr)
+        elif event["status"] == "warning":
+            print(event["message"], file=sys.stderr)
+            return 1
+        elif event["status"] == "done":
+            result = event
+    if args.json:
+        _print_json(result)
+    else:
+        print(f"Restored {result['restored']}, missing {result['missing']}, errors {result['errors']} "
+              f"(run {result['run_id']})")
+    return 1 if errors else 0
+
+
+def cmd_analyze(args):
+    from analytics import compute_all, scan_directory
+
+    # compute_all needs no per-file strings
+    df = scan_directory(args.path, workers=args.workers, with_names=False, with_paths=False)
+    if df.empty:
+        print("No files found.", file=sys.stderr)
+        return 1
+    result = compute_all(df)
+    if args.json:
+        monthly, prediction = result["forecast"] if result["forecast"] is not None else (None, [])
+        _print_json({
+            "files": len(df),
+            "size_mb": float(df["Size_MB"].sum()),
+            "file_types": result["file_types"].to_dict(),
+            "categories_mb": result["categories"].to_dict(),
+            "folder_sizes_mb": result["folder_sizes"].head(args.top).to_dict(),
+            "growth": {str(k): int(v) for k, v in result["growth"].items()},
+            "forecast_next_months": [float(x) for x in prediction],
+        })
+        return 0
+    print(f"{len(df):,} files, {df['Size_MB'].sum():,.1f} MB")
+    print("Size by category (MB):")
+    for category, size in result["categories"].items():
+        print(f"  {category:<12}{size:>12,.1f}")
+    print("Most common extensions:")
+    for ext, count in result["file_types"].head(args.top).items():
+        print(f"  {ext or '(none)':<12}{count:>12,}")
+    print("Largest folders (MB):")
+    for folder, size in result["folder_sizes"].head(args.top).items():
+        print(f"  {size:>12,.1f}  {folder}")
+    if result["forecast"] is not None:
+        _, prediction = result["forecast"]
+        print("Forecast (new files per month): " + ", ".join(f"{max(0.0, p):,.0f}" for p in prediction))
+    return 0
+
+
+def cmd_dedupe(args):
+    from scanner import FolderScanner
+    from scan_cache import ScanCache
+
+    with ScanCache() as cache:
+        scanner = FolderScanner(args.path, cache=cache)
+        scanner.scan(workers=args.workers)
+        found = scanner.find_duplicates(min_size=args.min_size, byte_budget=args.byte_budget)
+    if args.json:
+        _print_json(found)
+        return 0
+    wasted = sum(group["wasted"] for group in found["groups"])
+    for group in found["groups"]:
+        print(f"{group['count']} x {group['size_formatted']}:")
+        for path in group["files"]:
+            print(f"  {path}")
+    print(f"{len(found['groups'])} duplicate groups, {scanner.format_size(wasted)} reclaimable"
+          + ("" if found["complete"] else " (byte budget reached, results incomplete)"))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="smartfileorganizer", description="Organize, scan and analyze folders.")
+    parser.add_argument("--log-level", type=int, choices=(0, 1, 2), default=1,
+                        help="log file detail: 0 warnings, 1 progress summaries, 2 every file")
+    parser.add_argument("--log-folder", default=LOG_FOLDER, help="where the rotating log file goes")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("organize", parents=[common], help="sort files into category folders")
+    p.add_argument("path")
+    p.add_argument("-r", "--recursive", action="store_true", help="include subfolders")
+    p.add_argument("--max-depth", type=int, help="with --recursive: how deep to go (0 = top level)")
+    p.add_argument("--exclude", action="append", metavar="PATTERN", help="glob to leave alone (repeatable)")
+    p.add_argument("--workers", type=int, default=COPY_WORKERS, help="parallel cross-device copies")
+    p.add_argument("-v", "--verbose", action="store_true", help="print every file")
+    p.set_defaults(func=cmd_organize)
+
+    p = sub.add_parser("scan", parents=[common], help="deep scan a folder")
+    p.add_argument("path")
+    p.add_argument("--incremental", action="store_true", help="reuse the previous scan's snapshot")
+    p.add_argument("--workers", type=int, default=SCAN_WORKERS, help="folders listed in parallel")
+    p.add_argument("--processes", type=int, default=SCAN_PROCESSES,
+                   help="walk and classify on this many processes (uses more cores)")
+    p.add_argument("--top-k", type=_positive_int, default=SCAN_TOP_K, help="largest/oldest/newest files to keep")
+    p.add_argument("--top", type=int, default=10, help="largest files to print")
+    p.add_argument("--export", metavar="FILE",
+                   help="stream every file to FILE while scanning (.jsonl or .csv, add .gz to compress)")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("undo", parents=[common], help="undo an organize run (the last one by default)")
+    p.add_argument("run_id", nargs="?")
+    p.add_argument("--match", action="append", metavar="PATTERN", help="only restore matching files (repeatable)")
+    p.add_argument("--workers", type=int, default=SCAN_WORKERS)
+    p.add_argument("--list", action="store_true", help="list recent runs instead")
+    p.add_argument("--limit", type=int, default=20, help="runs shown by --list")
+    p.set_defaults(func=cmd_undo)
+
+    p = sub.add_parser("analyze", parents=[common], help="storage analytics and growth forecast")
+    p.add_argument("path")
+    p.add_argument("--workers", type=int, default=SCAN_WORKERS)
+    p.add_argument("--top", type=int, default=10)
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("dedupe", parents=[common], help="find duplicate files by content")
+    p.add_argument("path")
+    p.add_argument("--min-size", type=int, default=1, help="ignore smaller files (bytes)")
+    p.add_argument("--byte-budget", type=int, help="stop after reading this many bytes")
+    p.add_argument("--workers", type=int, default=SCAN_WORKERS)
+    p.set_defaults(func=cmd_dedupe)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # results are printed by the commands; the log only goes to the file
+    configure_logging(args.log_level, args.log_folder, console=False)
+    if getattr(args, "path", None) is not None:
+        if not os.path.isdir(args.path):
+            print(f"Not a directory: {args.path}", file=sys.stderr)
+            return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
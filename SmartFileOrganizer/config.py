@@ -8,3 +8,20 @@ CATEGORIES = {
 }
 
 DEFAULT_CATEGORY = "Others"
+
+# Extra classification rules, checked before the extension table.
+# Each rule has a "category" plus any of: "extensions" (may be compound,
+# e.g. ".tar.gz"), "glob" or "regex" on the file name, "min_size"/"max_size"
+# in bytes, "older_than_days"/"newer_than_days" on the modification time.
+# Example: {"category": "Screenshots", "glob": "Screenshot*.png"}
+CUSTOM_RULES = []
+
+# Number of largest/oldest/newest files kept by the scanner (bounded heaps)
+SCAN_TOP_K = 15
+
+# Threads used to list folders in parallel (helps on network shares)
+SCAN_WORKERS = 8
+
+# Processes for CLI scans; above 1, subtrees are walked and classified on a
+# process pool, using more than one core (the thread pool above is GIL bound)
+SCAN_PROCESSES = 1
@@ -0,0 +1,146 @@
+# dashboard_cache.py
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from file_table import FileTable
+from walker import parallel_walk
+
+CACHE_TTL = 600          # seconds a finished analysis is served without re-checking
+MAX_ENTRIES = 8          # analyses kept in memory (least recently used evicted)
+BACKGROUND_WORKERS = 2   # concurrent background analyses
+WALK_WORKERS = 8         # threads per analysis walk
+
+
+def folder_fingerprint(folder):
+    """
+    Cheap change fingerprint: mtimes of the folder and its direct subfolders.
+    Catches files added/removed near the top without walking the tree.
+    """
+    h = hashlib.sha1()
+    h.update(str(os.stat(folder).st_mtime_ns).encode())
+    with os.scandir(folder) as it:
+        for entry in sorted(it, key=lambda e: e.name):
+            if entry.is_dir(follow_symlinks=False):
+                h.update(entry.name.encode("utf-8", "surrogateescape"))
+                h.update(str(entry.stat(follow_symlinks=False).st_mtime_ns).encode())
+    return h.hexdigest()
+
+
+class AnalyticsJob:
+    """One background analysis; exposes partial aggregates while it runs."""
+
+    def __init__(self, folder, fingerprint, created=None):
+        self.folder = folder
+        self.fingerprint = fingerprint
+        # when the data was read: now, or the time of an adopted scan
+        self.created = created if created is not None else time.time()
+        self.status = "running"
+        self.result = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._files = 0
+        self._file_types = {}
+        self._folder_sizes = {}
+
+    def partial(self):
+        """(files so far, {ext: count}, {folder: MB}) snapshot for progressive charts."""
+        with self._lock:
+            return self._files, dict(self._file_types), dict(self._folder_sizes)
+
+    def _publish(self, files, file_types, folder_sizes):
+        with self._lock:
+            self._files += files
+            for ext, count in file_types.items():
+                self._file_types[ext] = self._file_types.get(ext, 0) + count
+            for folder, size in folder_sizes.items():
+                self._folder_sizes[folder] = self._folder_sizes.get(folder, 0) + size
+
+
+class AnalyticsCache:
+    """
+    Dashboard analyses keyed by (folder, fingerprint), computed on a
+    background pool with TTL expiry and LRU eviction. Finished FileTables
+    from the Scan view can be adopted so the folder is not walked again.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=MAX_ENTRIES, workers=BACKGROUND_WORKERS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def get(self, folder):
+        """Return the job for folder, starting a background analysis if needed."""
+        folder = os.path.abspath(folder)
+        fingerprint = folder_fingerprint(folder)
+        with self._lock:
+            job = self._fresh_job(folder, fingerprint)
+            if job is None:
+                job = self._start(folder, fingerprint)
+            self._jobs.move_to_end(folder)
+            return job
+
+    def adopt(self, folder, table, fingerprint, scanned_at):
+        """
+        Reuse a FileTable from a finished scan unless a fresh analysis exists.
+        fingerprint must be taken before the scan started and scanned_at is
+        when it started: the table is only adopted while the folder still has
+        that fingerprint and the scan is younger than the TTL.
+        """
+        folder = os.path.abspath(folder)
+        current = folder_fingerprint(folder)
+        if current != fingerprint or time.time() - scanned_at >= self.ttl:
+            return False
+        with self._lock:
+            if self._fresh_job(folder, current) is None:
+                self._start(folder, current, table, created=scanned_at)
+        return True
+
+    def _fresh_job(self, folder, fingerprint):
+        job = self._jobs.get(folder)
+        if job is None or job.status == "running":
+            return job
+        # the fingerprint is shallow, so the TTL bounds how stale deep changes can get
+        if job.fingerprint == fingerprint and time.time() - job.created < self.ttl:
+            return job
+        return None
+
+    def _start(self, folder, fingerprint, table=None, created=None):
+        job = AnalyticsJob(folder, fingerprint, created)
+        self._jobs[folder] = job
+        while len(self._jobs) > self.max_entries:
+            self._jobs.popitem(last=False)
+        self._pool.submit(_run_job, job, table)
+        return job
+
+
+def _run_job(job, table=None):
+    try:
+        if table is None:
+            table = FileTable()
+            files, file_types, folder_sizes = 0, {}, {}
+            for kind, path, name, st in parallel_walk(job.folder, WALK_WORKERS):
+                if kind == "file":
+                    folder = os.path.dirname(path)
+                    table.add_file(folder, name, st)
+                    ext = os.path.splitext(name)[1].lower()
+                    files += 1
+                    file_types[ext] = file_types.get(ext, 0) + 1
+                    folder_sizes[folder] = folder_sizes.get(folder, 0) + st.st_size / (1024 * 1024)
+                elif kind == "dir_done" and files:
+                    job._publish(files, file_types, folder_sizes)
+                    files, file_types, folder_sizes = 0, {}, {}
+            job._publish(files, file_types, folder_sizes)
+        # imported late so partial results start flowing before pandas loads
+        from analytics import compute_all
+        df = table.to_dataframe()
+        job.result = dict(compute_all(df), df=df)
+        job.status = "done"
+    except Exception as e:
+        job.error = str(e)
+        job.status = "error"
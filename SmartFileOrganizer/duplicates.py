@@ -0,0 +1,208 @@
+# duplicates.py
+import os
+import mmap
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from progress import ProgressThrottle
+
+PARTIAL_BYTES = 4096             # bytes hashed from the head and from the tail
+READ_CHUNK = 1024 * 1024         # buffered read size for full hashes
+MMAP_THRESHOLD = 64 * 1024 * 1024  # files at least this big are hashed via mmap
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=20)
+
+
+def partial_hash(path, size, partial_bytes=PARTIAL_BYTES):
+    """Hash the first and last `partial_bytes` of a file."""
+    h = _new_hash()
+    with open(path, "rb") as f:
+        h.update(f.read(partial_bytes))
+        if size > partial_bytes:
+            f.seek(max(size - partial_bytes, partial_bytes))
+            h.update(f.read(partial_bytes))
+    return h.hexdigest()
+
+
+def full_hash(path, size):
+    """Hash a whole file with large buffered reads, or mmap for big files."""
+    h = _new_hash()
+    with open(path, "rb") as f:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, len(mm), READ_CHUNK):
+                        h.update(view[offset:offset + READ_CHUNK])
+                finally:
+                    view.release()
+        else:
+            buf = bytearray(READ_CHUNK)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+    return h.hexdigest()
+
+
+def _run_bounded(func, jobs, max_workers):
+    """
+    Run func(*job) on a thread pool, keeping at most 2*max_workers jobs in
+    flight so huge candidate lists never become huge future lists.
+    Yields (job, result, error) in completion order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        for job in jobs:
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield _collect(pending.pop(fut), fut)
+            pending[pool.submit(func, *job)] = job
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield _collect(pending.pop(fut), fut)
+
+
+def _collect(job, fut):
+    try:
+        return job, fut.result(), None
+    except OSError as e:
+        return job, None, e
+
+
+def _hash_stage(jobs, func, kind, cost_of, max_workers, within_budget, cache, errors):
+    """
+    Run one hashing stage. Cache hits are served without reading the file;
+    misses go through the thread pool while the byte budget allows.
+    Yields (job, digest).
+    """
+    keys = {}
+    misses = []
+    for job in jobs:
+        path, size = job[0], job[1]
+        if cache is not None:
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                errors.append(f"{path}: {e}")
+                continue
+            if st.st_size != size:
+                continue  # changed since it was scanned
+            key = cache.key(st)
+            digest = cache.get_hash(key, kind)
+            if digest is not None:
+                yield job, digest
+                continue
+            keys[path] = key
+        misses.append(job)
+
+    def budgeted():
+        for job in misses:
+            if not within_budget(cost_of(job)):
+                return
+            yield job
+
+    for job, digest, error in _run_bounded(func, budgeted(), max_workers):
+        if error is not None:
+            errors.append(f"{job[0]}: {error}")
+            continue
+        if cache is not None:
+            cache.put_hash(keys[job[0]], job[0], kind, digest)
+        yield job, digest
+
+
+def find_duplicate_groups(size_groups, partial_bytes=PARTIAL_BYTES, max_workers=4,
+                          byte_budget=None, min_size=1, cache=None, progress_callback=None):
+    """
+    Staged duplicate detection over {size: [paths]}:
+      1. drop sizes with a single file (or below min_size),
+      2. hash the first/last `partial_bytes` of each candidate,
+      3. fully hash only files whose partial hashes still collide.
+    Reading stops once `byte_budget` bytes would be exceeded; the result is
+    then marked incomplete and unverified candidates are left out.
+    With a ScanCache, hashes of unchanged files are never recomputed.
+    progress_callback gets throttled per-stage updates with rate and ETA.
+    Returns {"groups": [(size, digest, [paths]), ...], "bytes_read": n,
+             "complete": bool, "errors": [...]}.
+    """
+    state = {"bytes_read": 0, "complete": True}
+    errors = []
+
+    def within_budget(cost):
+        if byte_budget is not None and state["bytes_read"] + cost > byte_budget:
+            state["complete"] = False
+            return False
+        state["bytes_read"] += cost
+        return True
+
+    def report(stage, throttle, done, total):
+        if progress_callback and (throttle.ready(done) or done == total):
+            progress_callback(dict({
+                "status": "hashing",
+                "stage": stage,
+                "current": done,
+                "total": total,
+                "bytes": state["bytes_read"]
+            }, **throttle.stats(done, total)))
+
+    # Stage 1: size groups
+    candidates = [
+        (size, paths) for size, paths in size_groups.items()
+        if len(paths) > 1 and size >= min_size
+    ]
+
+    # Stage 2: head/tail hash
+    partial_groups = {}
+    partial_total = sum(len(paths) for _, paths in candidates)
+    throttle = ProgressThrottle()
+    jobs = ((path, size, partial_bytes) for size, paths in candidates for path in paths)
+    stage = _hash_stage(
+        jobs, partial_hash, f"partial:{partial_bytes}",
+        lambda job: min(job[1], 2 * job[2]),
+        max_workers, within_budget, cache, errors
+    )
+    for done, ((path, size, _), digest) in enumerate(stage, 1):
+        partial_groups.setdefault((size, digest), []).append(path)
+        report("partial", throttle, done, partial_total)
+
+    # Stage 3: full hash, skipped for files the partial pass already read whole
+    groups = []
+    full_jobs = []
+    for (size, digest), paths in partial_groups.items():
+        if len(paths) < 2:
+            continue
+        if size <= 2 * partial_bytes:
+            groups.append((size, digest, sorted(paths)))
+        else:
+            full_jobs.extend((path, size) for path in paths)
+
+    full_groups = {}
+    throttle = ProgressThrottle()
+    stage = _hash_stage(
+        full_jobs, full_hash, "full", lambda job: job[1],
+        max_workers, within_budget, cache, errors
+    )
+    for done, ((path, size), digest) in enumerate(stage, 1):
+        full_groups.setdefault((size, digest), []).append(path)
+        report("full", throttle, done, len(full_jobs))
+
+    if cache is not None:
+        cache.flush()
+
+    groups.extend(
+        (size, digest, sorted(paths))
+        for (size, digest), paths in full_groups.items() if len(paths) > 1
+    )
+    # most wasted space first
+    groups.sort(key=lambda g: g[0] * (len(g[2]) - 1), reverse=True)
+    return {
+        "groups": groups,
+        "bytes_read": state["bytes_read"],
+        "complete": state["complete"],
+        "errors": errors
+    }
@@ -0,0 +1,138 @@
+# event_log.py
+import os
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+
+LOG_FOLDER = "logs"
+LOG_FILE = "organizer.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024   # rotate at this size...
+LOG_BACKUPS = 5                   # ...keeping this many old files
+SUMMARY_INTERVAL = 5.0            # seconds between progress summaries
+MAX_ERROR_LINES = 20              # errors logged one by one per run; the rest are counted
+
+LOGGER_NAME = "smartfileorganizer"
+# nothing is printed until an entry point calls configure_logging()
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+_listener = None
+
+
+def configure_logging(verbosity=1, log_folder=LOG_FOLDER, console=True):
+    """
+    Send the package's log records through a queue to a background thread
+    that writes them to a rotating file (and the console), so logging never
+    blocks the organizer on disk I/O.
+    verbosity: 0 = warnings only, 1 = periodic progress and run summaries,
+    2 = every file as well. Calling it again replaces the previous setup.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        _stop_listener()
+        for handler in [h for h in logger.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+            logger.removeHandler(handler)
+
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    handlers = []
+    if log_folder:
+        os.makedirs(log_folder, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_folder, LOG_FILE), maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUPS, encoding="utf-8")
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+    records = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel({0: logging.WARNING, 1: logging.INFO}.get(verbosity, logging.DEBUG))
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return logger
+
+
+@atexit.register
+def _stop_listener():
+    """Flush queued records and close the files (also run at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def get_logger(name):
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+class EventLogger:
+    """
+    Batched sink for organizer-style events. Instead of a log line per file it
+    counts events and logs a progress summary every SUMMARY_INTERVAL seconds,
+    the first MAX_ERROR_LINES errors, and one line when the run ends. At
+    DEBUG level (verbosity 2) every file is logged as well.
+    """
+
+    def __init__(self, logger, label, interval=SUMMARY_INTERVAL):
+        self.logger = logger
+        self.label = label
+        self.interval = interval
+        self.per_event = logger.isEnabledFor(logging.DEBUG)
+        self.summaries = logger.isEnabledFor(logging.INFO)
+        self.counts = {}
+        self.errors = 0
+        self.start = time.monotonic()
+        self._next = self.start + interval
+
+    def emit(self, event):
+        status = event.get("status")
+        self.counts[status] = self.counts.get(status, 0) + 1
+        if status == "error":
+            self.errors += 1
+            if self.errors <= MAX_ERROR_LINES:
+                self.logger.warning("%s: error on %s: %s", self.label, event.get("file", ""), event.get("message"))
+            elif self.errors == MAX_ERROR_LINES + 1:
+                self.logger.warning("%s: more errors, only counting them from now on", self.label)
+        elif status == "warning":
+            self.logger.warning("%s: %s", self.label, event.get("message"))
+        elif status == "done":
+            self.logger.info("%s: done in %.1fs, %s", self.label, time.monotonic() - self.start,
+                             self._summary(event))
+        elif self.per_event:
+            self.logger.debug("%s: %s %s %s", self.label, status, event.get("file", ""),
+                              event.get("category") or event.get("reason") or "")
+        if self.summaries:
+            now = time.monotonic()
+            if now >= self._next:
+                self._next = now + self.interval
+                self.logger.info("%s: %s", self.label, self._summary(event))
+
+    def close(self):
+        """Log the end of a run that produced no "done" event."""
+        if "done" not in self.counts:
+            self.logger.info("%s: finished in %.1fs, %s", self.label, time.monotonic() - self.start,
+                             self._summary({}))
+
+    def _summary(self, event):
+        parts = [f"{count:,} {status}" for status, count in sorted(self.counts.items())
+                 if status not in ("done", "warning")]
+        if event.get("total"):
+            parts.append(f"{event['done']:,}/{event['total']:,}")
+        return ", ".join(parts) or "nothing to do"
+
+
+def log_events(events, logger, label):
+    """Pass events through unchanged, feeding them to an EventLogger."""
+    sink = EventLogger(logger, label)
+    for event in events:
+        sink.emit(event)
+        yield event
+    sink.close()
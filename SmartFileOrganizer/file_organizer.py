@@ -1,80 +1,302 @@
 import os
-import shutil
-import logging
-from datetime import datetime
+import stat
+import time
 import uuid
-from config import CATEGORIES, DEFAULT_CATEGORY
+import fnmatch
+from classifier import get_classifier
+from mover import COPY_WORKERS, execute_moves
 from history_store import save_history, undo_last_operation
+from move_journal import MoveJournal
+from metrics import Metrics
+from event_log import get_logger, log_events
 
-#Logging Setup
-LOG_FOLDER = "logs"
-os.makedirs(LOG_FOLDER, exist_ok=True)
-log_file = os.path.join(LOG_FOLDER, f"organizer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+#Logging: handlers are set up by the entry points (event_log.configure_logging)
+logger = get_logger("organizer")
 
 #Category Helper
 def get_category(extension):
     """Return category name for given file extension."""
-    for category, extensions in CATEGORIES.items():
-        if extension.lower() in extensions:
-            return category
-    return DEFAULT_CATEGORY
+    return get_classifier().category_for_extension(extension)
+
+#Move Planning
+class MovePlanner:
+    """
+    Resolves collision-free destinations in memory. Each category folder is
+    listed at most once; later names are checked against that set (plus the
+    names already planned) instead of probing the disk with os.path.exists.
+    """
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self._taken = {}        # category folder -> set of normcased names
+        self._next_suffix = {}  # (folder, base, ext) -> next counter to try
+
+    def _names_in(self, folder):
+        names = self._taken.get(folder)
+        if names is None:
+            try:
+                names = {os.path.normcase(n) for n in os.listdir(folder)}
+            except (FileNotFoundError, NotADirectoryError):
+                names = set()
+            self._taken[folder] = names
+        return names
+
+    def destination(self, file, category):
+        """Destination path for file in category, renamed to name_N.ext on collision."""
+        folder = os.path.join(self.base_path, category)
+        names = self._names_in(folder)
+        candidate = file
+        if os.path.normcase(candidate) in names:
+            base_name, extension = os.path.splitext(file)
+            key = (folder, base_name, extension)
+            counter = self._next_suffix.get(key, 1)
+            candidate = f"{base_name}_{counter}{extension}"
+            while os.path.normcase(candidate) in names:
+                counter += 1
+                candidate = f"{base_name}_{counter}{extension}"
+            self._next_suffix[key] = counter + 1
+        names.add(os.path.normcase(candidate))
+        return os.path.join(folder, candidate)
+
+def iter_plan(path, entries, planner=None, classifier=None, metrics=None):
+    """
+    Plan moves one file at a time. entries yields (file name, source path,
+    stat or None); stat is only needed for size/age rules.
+    Yields {"file", "src", "dst", "category"} dicts, or {"file", "reason"}
+    for files that will be skipped.
+    """
+    planner = planner or MovePlanner(path)
+    classifier = classifier or get_classifier()
+    clock = time.perf_counter
+    spent = 0.0
+    try:
+        for file, src, st in entries:
+            start = clock()
+            category = classifier.classify(file, st and st.st_size, st and st.st_mtime, default=False)
+            if category is None and not os.path.splitext(file)[1]:
+                item = {"file": file, "reason": "No extension"}
+            else:
+                category = category or classifier.default
+                item = {
+                    "file": file,
+                    "src": src,
+                    "dst": planner.destination(file, category),
+                    "category": category
+                }
+            spent += clock() - start
+            yield item
+    finally:
+        if metrics is not None:
+            metrics.add_time("classify", spent)
+
+def plan_moves(path, files, planner=None, stats=None, classifier=None, metrics=None):
+    """
+    Planning phase: decide every move up front.
+    stats maps file name -> stat result, needed only for size/age rules.
+    """
+    entries = ((f, os.path.join(path, f), stats.get(f) if stats else None) for f in files)
+    return list(iter_plan(path, entries, planner, classifier, metrics))
+
+def with_category_folders(plan, metrics=None):
+    """
+    Create each destination folder the first time it is needed. Items whose
+    folder cannot be created lose their "src" and carry an "error" instead.
+    """
+    ready = {}
+    for item in plan:
+        if "dst" in item:
+            folder = os.path.dirname(item["dst"])
+            error = ready.get(folder)
+            if error is None and folder not in ready:
+                start = time.perf_counter()
+                try:
+                    os.makedirs(folder, exist_ok=True)
+                except OSError as e:
+                    error = str(e)
+                ready[folder] = error
+                if metrics is not None:
+                    metrics.add_time("mkdir", time.perf_counter() - start)
+                    metrics.count("mkdir")
+            if error:
+                item = {"file": item["file"], "error": error}
+        yield item
+
+def iter_files(path, max_depth=None, exclude=None, skip_dirs=(), with_stat=False):
+    """
+    Stream (file name, path, stat or None) for every file under path,
+    without listing the whole tree first. Top-level folders named in
+    skip_dirs (the category folders) are not entered; exclude holds glob
+    patterns matched against names and paths relative to path.
+    max_depth=0 means top-level files only.
+    """
+    stack = [(path, "", 0)]
+    while stack:
+        folder, rel_folder, depth = stack.pop()
+        try:
+            it = os.scandir(folder)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                rel = f"{rel_folder}/{entry.name}" if rel_folder else entry.name
+                if exclude and any(fnmatch.fnmatch(entry.name, p) or fnmatch.fnmatch(rel, p) for p in exclude):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if depth == 0 and entry.name in skip_dirs:
+                            continue
+                        if max_depth is None or depth < max_depth:
+                            stack.append((entry.path, rel, depth + 1))
+                    elif entry.is_file():
+                        yield entry.name, entry.path, entry.stat() if with_stat else None
+                except OSError:
+                    continue
 
 # Main Logic
-def organize_directory(path):
+def organize_directory(path, workers=COPY_WORKERS, recursive=False, max_depth=None, exclude=None,
+                       classifier=None):
     """
     Organizes files in any system folder.
+    Plans every move first (category folders and renamed duplicates are
+    resolved in memory), then executes the plan: same-filesystem moves are
+    plain renames, cross-device ones are copied on `workers` threads.
+    recursive=True streams files from the whole subtree instead (skipping the
+    category folders, down to max_depth, minus exclude glob patterns) and
+    moves them as they are discovered; events then carry "discovered" and
+    "total" is None.
+    classifier overrides the shared one built from config (e.g. per-job rules).
     Yields dicts for GUI (Streamlit) progress:
         {"status": ..., "file": ..., "category": ..., "done": i, "total": n}
     """
-    moved_files = []
+    return log_events(_organize_directory(path, workers, recursive, max_depth, exclude, classifier),
+                      logger, f"organize {path}")
 
+def _organize_directory(path, workers, recursive, max_depth, exclude, classifier):
     if not os.path.exists(path) or not os.path.isdir(path):
         yield {"status": "error", "message": f"Invalid path: {path}"}
         return
 
-    files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
+    if recursive:
+        yield from _organize_recursive(path, workers, max_depth, exclude, classifier)
+        return
+
+    metrics = Metrics()
+    needs_stat = (classifier or get_classifier()).needs_stat
+    stats = {} if needs_stat else None
+    files = []
+    with metrics.phase("list"):
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file():
+                    files.append(entry.name)
+                    if needs_stat:
+                        stats[entry.name] = entry.stat()
+    metrics.count("scandir")
+    metrics.count("files_listed", len(files))
+    if needs_stat:
+        metrics.count("stat", len(files))
+    yield from _organize_files(path, files, workers, stats, classifier, metrics)
+
+def organize_files(path, files, workers=COPY_WORKERS, stats=None, classifier=None, metrics=None):
+    """
+    Organize only the given files (names directly inside path), e.g. the new
+    arrivals reported by watcher.py. Names that are gone or are not regular
+    files are ignored. stats maps name -> stat result when already known.
+    Yields the same events as organize_directory; the "done" event carries
+    the run's metrics (see metrics.py).
+    """
+    return log_events(_organize_files(path, files, workers, stats, classifier, metrics),
+                      logger, f"organize {len(files)} files in {path}")
+
+def _organize_files(path, files, workers, stats, classifier, metrics):
+    metrics = metrics or Metrics()
+    if stats is None:
+        stats = {}
+        with metrics.phase("stat"):
+            for name in files:
+                try:
+                    st = os.stat(os.path.join(path, name))
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    stats[name] = st
+        metrics.count("stat", len(files))
+        files = [name for name in files if name in stats]
+    moved_files = []
     total_files = len(files)
     if total_files == 0:
         yield {"status": "warning", "message": "No files found to organize."}
         return
 
-    for i, file in enumerate(files):
-        file_path = os.path.join(path, file)
-        _, ext = os.path.splitext(file)
-        if not ext:
-            yield {"status": "skipped", "file": file, "reason": "No extension", "done": i + 1, "total": total_files}
-            continue
+    plan = plan_moves(path, files, stats=stats, classifier=classifier, metrics=metrics)
+    run_id = str(uuid.uuid4())
+    journal = MoveJournal(run_id, path, metrics=metrics)
+    try:
+        moves = execute_moves(journal.guard(with_category_folders(plan, metrics)), workers, metrics)
+        for done, (item, error) in enumerate(moves, 1):
+            event = _move_event(item, error, moved_files)
+            event.update(done=done, total=total_files)
+            yield event
 
-        category = get_category(ext)
-        category_folder = os.path.join(path, category)
-        os.makedirs(category_folder, exist_ok=True)
-        destination_path = os.path.join(category_folder, file)
+        if moved_files:
+            with metrics.phase("history"):
+                save_history(run_id, moved_files)
+        journal.commit()
+    finally:
+        # interrupted: the journal stays behind for resume_run/rollback_run
+        journal.close()
+    if moved_files:
+        metrics.count("files_moved", len(moved_files))
+        yield {"status": "done", "moved": len(moved_files), "skipped": total_files - len(moved_files), "run_id": run_id,
+               "metrics": metrics.as_dict()}
 
-        # Handle duplicates
-        if os.path.exists(destination_path):
-            base_name, extension = os.path.splitext(file)
-            counter = 1
-            while os.path.exists(destination_path):
-                destination_path = os.path.join(category_folder, f"{base_name}_{counter}{extension}")
-                counter += 1
+def _move_event(item, error, moved_files):
+    """Progress event for one executed plan item; records successful moves."""
+    file = item["file"]
+    if "reason" in item:
+        return {"status": "skipped", "file": file, "reason": item["reason"]}
+    if error is not None or "error" in item:
+        message = str(error) if error is not None else item["error"]
+        return {"status": "error", "file": file, "message": message}
+    moved_files.append({"from": item["src"], "to": item["dst"]})
+    return {"status": "moved", "file": file, "category": item["category"]}
 
-        try:
-            shutil.move(file_path, destination_path)
-            moved_files.append({"from": file_path, "to": destination_path})
-            yield {"status": "moved", "file": file, "category": category, "done": i + 1, "total": total_files}
-        except Exception as e:
-            yield {"status": "error", "file": file, "message": str(e), "done": i + 1, "total": total_files}
+def _organize_recursive(path, workers, max_depth, exclude, classifier=None):
+    """Streaming variant of organize_directory for whole subtrees."""
+    moved_files = []
+    classifier = classifier or get_classifier()
+    metrics = Metrics()
+    counts = {"discovered": 0}
 
+    def discovered():
+        files = iter_files(path, max_depth, exclude, classifier.category_names(), classifier.needs_stat)
+        for entry in metrics.timed_iter("list", files):
+            counts["discovered"] += 1
+            yield entry
+
+    plan = iter_plan(path, discovered(), classifier=classifier, metrics=metrics)
+    run_id = str(uuid.uuid4())
+    journal = MoveJournal(run_id, path, metrics=metrics)
+    done = 0
+    try:
+        moves = execute_moves(journal.guard(with_category_folders(plan, metrics)), workers, metrics)
+        for done, (item, error) in enumerate(moves, 1):
+            event = _move_event(item, error, moved_files)
+            event.update(done=done, total=None, discovered=counts["discovered"])
+            yield event
+
+        if moved_files:
+            with metrics.phase("history"):
+                save_history(run_id, moved_files)
+        journal.commit()
+    finally:
+        journal.close()
+
+    if done == 0:
+        yield {"status": "warning", "message": "No files found to organize."}
+        return
     if moved_files:
-        run_id = str(uuid.uuid4())
-        save_history(run_id, moved_files)
-        yield {"status": "done", "moved": len(moved_files), "skipped": total_files - len(moved_files), "run_id": run_id}
+        metrics.count("files_listed", counts["discovered"])
+        metrics.count("files_moved", len(moved_files))
+        yield {"status": "done", "moved": len(moved_files), "skipped": done - len(moved_files), "run_id": run_id,
+               "metrics": metrics.as_dict()}
@@ -0,0 +1,171 @@
+# file_table.py
+import os
+import time
+from array import array
+from classifier import get_classifier
+
+
+_NS_PER_HOUR = 3600 * 10**9
+
+
+def _local_ns(ns):
+    """
+    Epoch nanoseconds (UTC) -> local wall-clock nanoseconds, so monthly
+    buckets fall where datetime.fromtimestamp would put them. The UTC offset
+    is looked up once per distinct hour, which also gets DST right.
+    """
+    import numpy as np
+    hours, inverse = np.unique(ns // _NS_PER_HOUR, return_inverse=True)
+    offsets = np.empty(len(hours), dtype=np.int64)
+    for i, hour in enumerate(hours.tolist()):
+        try:
+            offsets[i] = time.localtime(hour * 3600).tm_gmtoff
+        except (OverflowError, OSError, ValueError):
+            offsets[i] = 0   # out of the platform's range
+    return ns + offsets[inverse.reshape(-1)] * 10**9
+
+
+class FileTable:
+    """
+    Compact columnar table of scanned files.
+    Numeric columns live in typed arrays (size, mtime_ns, ctime_ns, extension
+    id, category id, folder id); folder, extension and category strings are
+    interned once and file names are packed into one UTF-8 blob. That is ~40 bytes per file plus the
+    name, instead of a dict and several Python objects per file.
+
+    Implements the walker accumulator protocol (add/merge), so it can be
+    filled by FolderScanner or by walker.parallel_reduce.
+    """
+
+    def __init__(self):
+        self.sizes = array('q')
+        self.mtimes = array('q')      # ns since epoch
+        self.ctimes = array('q')      # ns since epoch
+        self.ext_ids = array('i')
+        self.dir_ids = array('i')
+        self.cat_ids = array('i')
+        self.extensions = []          # id -> ".ext" ("" when none)
+        self.dirs = []                # id -> folder path
+        self.categories = []          # id -> category from the shared classifier
+        self._ext_index = {}
+        self._cat_index = {}
+        self._classify = get_classifier().classify
+        self._dir_index = {}
+        self._names = bytearray()
+        self._name_ends = array('q')
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def add(self, kind, path, name, st):
+        if kind == "file":
+            self.add_file(os.path.dirname(path), name, st)
+
+    def add_file(self, folder, name, st):
+        dir_id = self._dir_index.get(folder)
+        if dir_id is None:
+            dir_id = self._dir_index[folder] = len(self.dirs)
+            self.dirs.append(folder)
+        ext = os.path.splitext(name)[1].lower()
+        ext_id = self._ext_index.get(ext)
+        if ext_id is None:
+            ext_id = self._ext_index[ext] = len(self.extensions)
+            self.extensions.append(ext)
+
+        category = self._classify(name, st.st_size, st.st_mtime)
+        cat_id = self._cat_index.get(category)
+        if cat_id is None:
+            cat_id = self._cat_index[category] = len(self.categories)
+            self.categories.append(category)
+
+        self.sizes.append(st.st_size)
+        self.mtimes.append(st.st_mtime_ns)
+        self.ctimes.append(st.st_ctime_ns)
+        self.ext_ids.append(ext_id)
+        self.dir_ids.append(dir_id)
+        self.cat_ids.append(cat_id)
+        self._names += name.encode("utf-8", "surrogateescape")
+        self._name_ends.append(len(self._names))
+
+    def merge(self, other):
+        """Append another table, remapping its folder/extension/category ids."""
+        dir_map = array('i', (self._intern_dir(d) for d in other.dirs))
+        ext_map = array('i', (self._intern_ext(e) for e in other.extensions))
+        cat_map = array('i', (self._intern_category(c) for c in other.categories))
+        offset = len(self._names)
+        self.sizes.extend(other.sizes)
+        self.mtimes.extend(other.mtimes)
+        self.ctimes.extend(other.ctimes)
+        self.dir_ids.extend(dir_map[i] for i in other.dir_ids)
+        self.ext_ids.extend(ext_map[i] for i in other.ext_ids)
+        self.cat_ids.extend(cat_map[i] for i in other.cat_ids)
+        self._names += other._names
+        self._name_ends.extend(end + offset for end in other._name_ends)
+        return self
+
+    def _intern_dir(self, folder):
+        if folder not in self._dir_index:
+            self._dir_index[folder] = len(self.dirs)
+            self.dirs.append(folder)
+        return self._dir_index[folder]
+
+    def _intern_ext(self, ext):
+        if ext not in self._ext_index:
+            self._ext_index[ext] = len(self.extensions)
+            self.extensions.append(ext)
+        return self._ext_index[ext]
+
+    def _intern_category(self, category):
+        if category not in self._cat_index:
+            self._cat_index[category] = len(self.categories)
+            self.categories.append(category)
+        return self._cat_index[category]
+
+    def name(self, i):
+        start = self._name_ends[i - 1] if i else 0
+        return self._names[start:self._name_ends[i]].decode("utf-8", "surrogateescape")
+
+    def path(self, i):
+        return os.path.join(self.dirs[self.dir_ids[i]], self.name(i))
+
+    def columns(self):
+        """
+        NumPy views over the typed arrays (no copy). The table must not grow
+        while these views are alive.
+        """
+        import numpy as np
+        return {
+            "size": np.frombuffer(self.sizes, dtype=np.int64),
+            "mtime_ns": np.frombuffer(self.mtimes, dtype=np.int64),
+            "ctime_ns": np.frombuffer(self.ctimes, dtype=np.int64),
+            "ext_id": np.frombuffer(self.ext_ids, dtype=np.int32),
+            "dir_id": np.frombuffer(self.dir_ids, dtype=np.int32),
+            "cat_id": np.frombuffer(self.cat_ids, dtype=np.int32),
+        }
+
+    def to_dataframe(self, with_names=False, with_paths=False):
+        """
+        Wrap the table as a DataFrame. Numeric columns share memory with the
+        table; Extension, Category and Folder are categoricals over the
+        interned strings. Modified_At/Created_At are naive local times, like
+        datetime.fromtimestamp gives. Name/Path build one string per file, so
+        they are opt-in.
+        """
+        import pandas as pd
+        cols = self.columns()
+        data = {
+            "Size": cols["size"],
+            "Size_MB": cols["size"] / (1024 * 1024),
+            "Extension": pd.Categorical.from_codes(cols["ext_id"], categories=pd.Index(self.extensions, dtype=object)),
+            "Category": pd.Categorical.from_codes(cols["cat_id"], categories=pd.Index(self.categories, dtype=object)),
+            "Folder": pd.Categorical.from_codes(cols["dir_id"], categories=pd.Index(self.dirs, dtype=object)),
+            "Modified_At": _local_ns(cols["mtime_ns"]).view("datetime64[ns]"),
+            "Created_At": _local_ns(cols["ctime_ns"]).view("datetime64[ns]"),
+        }
+        if with_names or with_paths:
+            names = [self.name(i) for i in range(len(self))]
+            if with_names:
+                data["Name"] = names
+            if with_paths:
+                data["Path"] = [os.path.join(self.dirs[d], n) for d, n in zip(self.dir_ids, names)]
+        return pd.DataFrame(data, copy=False)
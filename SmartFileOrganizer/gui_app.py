@@ -1,13 +1,63 @@
 import streamlit as st
 import os
+import fnmatch
+from collections import deque
 from file_organizer import organize_directory
-from history_store import undo_last_operation
+from history_store import load_history_index, undo_run
+from move_journal import interrupted_runs, resume_run, rollback_run
 from datetime import datetime
 import json
 import plotly.express as px
 import plotly.graph_objects as go
-from analytics import *
 from scanner import FolderScanner, deep_scan
+from config import SCAN_TOP_K, SCAN_WORKERS
+from dashboard_cache import AnalyticsCache, folder_fingerprint
+from scheduler import JOBS_FILE, JobSchedule, load_jobs, save_jobs
+from event_log import configure_logging
+from progress import throttle_events
+from scan_export import EXPORT_FOLDER, ScanExporter, cleanup_exports, unique_export_path
+import pandas as pd
+import time
+
+LOG_TAIL = 200          # lines kept in the organize log panel
+# exports go to ./static next to this script; with server.enableStaticServing
+# (see .streamlit/config.toml) Streamlit serves them from disk at app/static/
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), EXPORT_FOLDER)
+EXPORT_CHOICES = {"JSON lines (gzip)": "scan_files.jsonl.gz", "CSV (gzip)": "scan_files.csv.gz"}
+
+@st.cache_resource(show_spinner=False)
+def _setup_logging():
+    # once per server process, not on every rerun
+    configure_logging(console=False)
+
+def _download_link(path, label, mime):
+    """Offer a file on disk for download without loading it into the session when possible."""
+    if st.get_option("server.enableStaticServing") and os.path.dirname(os.path.abspath(path)) == EXPORT_DIR:
+        # static files of unknown types are sent as text/plain, hence the download attribute
+        name = os.path.basename(path)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        st.markdown(f'<a href="app/static/{name}" download="{name}">⬇️ {label}</a> ({size_mb:,.1f} MB)',
+                    unsafe_allow_html=True)
+    else:
+        # fallback: Streamlit keeps the whole file in memory for the button
+        with open(path, "rb") as f:
+            st.download_button(label=label, data=f, file_name=os.path.basename(path), mime=mime)
+
+def _replace_export(key):
+    """Drop this session's previous export under key and exports left by old sessions."""
+    previous = st.session_state.get(key)
+    if previous and os.path.exists(previous['path']):
+        os.remove(previous['path'])
+    st.session_state[key] = None
+    other = st.session_state.get('summary_export' if key == 'scan_export' else 'scan_export')
+    cleanup_exports(EXPORT_DIR, keep=[other['path']] if other else ())
+
+def _eta_text(event):
+    """' · 1,234 files/s · ~12s left' from a throttled progress event."""
+    text = f" · {event['rate']:,.0f} files/s" if event.get("rate") else ""
+    if event.get("eta") is not None:
+        text += f" · ~{event['eta']:,.0f}s left"
+    return text
 
 # Page configuration
 st.set_page_config(
@@ -17,6 +67,9 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# after set_page_config, which has to be the first Streamlit command
+_setup_logging()
+
 #  CSS styling animated cards
 st.markdown("""
 <style>
@@ -301,9 +354,25 @@ input[type="time"] {
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_analytics_cache():
+    """One background analytics cache shared by every session and rerun."""
+    return AnalyticsCache()
+
+def render_dashboard_charts(file_type_data, folder_sizes):
+    # File Type Distribution
+    st.subheader(" File Type Distribution")
+    fig = px.pie(values=file_type_data.values, names=file_type_data.index, title="File Type Distribution")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Folder Size Distribution
+    st.subheader("Folder Size Overview (MB)")
+    fig2 = px.bar(x=folder_sizes.index[:10], y=folder_sizes.values[:10], title="Top 10 Largest Folders")
+    st.plotly_chart(fig2, use_container_width=True)
+
 # Initialize session state
 if 'logs' not in st.session_state:
-    st.session_state.logs = []
+    st.session_state.logs = deque(maxlen=LOG_TAIL)
 if 'stats' not in st.session_state:
     st.session_state.stats = {'moved': 0, 'skipped': 0, 'errors': 0}
 if 'scheduled_times' not in st.session_state:
@@ -314,6 +383,12 @@ if 'current_view' not in st.session_state:
     st.session_state.current_view = 'home'
 if 'scan_results' not in st.session_state:
     st.session_state.scan_results = None
+if 'scan_table' not in st.session_state:
+    st.session_state.scan_table = None
+if 'scan_export' not in st.session_state:
+    st.session_state.scan_export = None
+if 'summary_export' not in st.session_state:
+    st.session_state.summary_export = None
 
 # Main container
 st.markdown("<div class='main-container'>", unsafe_allow_html=True)
@@ -385,6 +460,27 @@ elif st.session_state.current_view == 'organize':
     
     st.markdown("<div class='content-card'>", unsafe_allow_html=True)
     st.markdown("### 📁 Organize Folder")
+
+    # runs cut short by a crash or a closed tab, found in the move journal
+    for run in interrupted_runs():
+        st.warning(f" Interrupted run on {run['folder']} ({run['timestamp'][:19]}, {run['moves']:,} planned moves)")
+        col_resume, col_rollback = st.columns(2)
+        recover = None
+        if col_resume.button("▶ Resume", key=f"resume_{run['run_id']}"):
+            recover = resume_run
+        if col_rollback.button("⏪ Roll back", key=f"rollback_{run['run_id']}"):
+            recover = rollback_run
+        if recover:
+            with st.spinner("Recovering..."):
+                events = list(recover(run['run_id']))
+            errors = [e for e in events if e["status"] == "error"]
+            warnings = [e for e in events if e["status"] == "warning"]
+            if warnings:
+                st.warning(warnings[0]["message"])
+            elif errors:
+                st.error(f"{len(errors)} files could not be recovered, e.g. {errors[0]['file']}: {errors[0]['message']}")
+            else:
+                st.rerun()
     
     folder_path = st.text_input(" Folder Path", placeholder="e.g., C:\\Users\\YourName\\Downloads")
 
@@ -393,37 +489,59 @@ elif st.session_state.current_view == 'organize':
     elif folder_path and not os.path.isdir(folder_path):
         st.warning(" Not a directory!")
 
+    recursive = st.checkbox("Include subfolders", value=False,
+                            help="Also organize files in subfolders (category folders are left alone).")
+    exclude_text = ""
+    if recursive:
+        exclude_text = st.text_input(" Exclude patterns", placeholder="e.g., .git, node_modules, *.tmp")
+
     start_button = st.button(" Start Organization", key="start_org")
 
     if start_button and folder_path and os.path.isdir(folder_path):
         st.session_state.stats = {'moved':0,'skipped':0,'errors':0}
-        st.session_state.logs = []
+        st.session_state.logs = deque(maxlen=LOG_TAIL)
 
         progress_bar = st.progress(0)
         log_area = st.empty()
 
+        run_metrics = None
         try:
-            for event in organize_directory(folder_path):
+            exclude = [p.strip() for p in exclude_text.split(",") if p.strip()]
+            # a few updates per second whatever the folder size; counts cover the dropped events
+            events = throttle_events(organize_directory(folder_path, recursive=recursive, exclude=exclude))
+            for event in events:
                 done = event.get("done",0)
-                total = event.get("total",1)
-                progress_bar.progress(done/total)
-
+                total = event.get("total")
+                if total:
+                    progress_bar.progress(done/total, text=f"{done:,} / {total:,}{_eta_text(event)}")
+                elif "discovered" in event:
+                    # streaming mode: the total is unknown until the walk ends
+                    progress_bar.progress(done/max(event["discovered"],1),
+                                          text=f"{done:,} processed / {event['discovered']:,} found{_eta_text(event)}")
+
+                counts = event["counts"]
+                st.session_state.stats = {'moved': counts.get("moved", 0), 'skipped': counts.get("skipped", 0),
+                                          'errors': counts.get("error", 0)}
                 status = event["status"]
                 if status=="moved":
                     log_line = f" Moved {event['file']} → {event['category']}"
-                    st.session_state.stats['moved'] +=1
                 elif status=="skipped":
                     log_line = f" Skipped {event['file']} ({event['reason']})"
-                    st.session_state.stats['skipped'] +=1
                 elif status=="error":
                     log_line = f" Error {event.get('file','')}: {event.get('message','')}"
-                    st.session_state.stats['errors'] +=1
+                elif status=="done":
+                    log_line = f" Done: {event['moved']} moved, {event['skipped']} skipped"
+                    run_metrics = event.get("metrics")
                 else:
                     log_line = str(event)
 
                 st.session_state.logs.append(log_line)
+                # only the tail is rendered
                 log_area.markdown("<div class='log-container'>" + "<br>".join(st.session_state.logs) + "</div>", unsafe_allow_html=True)
 
+            if run_metrics:
+                with st.expander("⏱️ Run metrics"):
+                    st.json(run_metrics)
             st.balloons()
         except Exception as e:
             st.error(f"Error: {str(e)}")
@@ -446,6 +564,11 @@ elif st.session_state.current_view == 'scan':
     elif scan_folder and not os.path.isdir(scan_folder):
         st.warning(" Not a directory!")
 
+    incremental_scan = st.checkbox(
+        "Incremental scan (only re-read folders changed since the last scan)", value=False,
+        help="Faster, but files edited in place inside otherwise unchanged folders keep their old size and date.")
+    export_choice = st.selectbox("Write the full file list while scanning", ["No"] + list(EXPORT_CHOICES))
+
     col1, col2 = st.columns(2)
     with col1:
         scan_button = st.button(" Start Scan", key="start_scan", use_container_width=True)
@@ -458,17 +581,44 @@ elif st.session_state.current_view == 'scan':
         status_text = st.empty()
         
         def progress_callback(event):
+            # called a few times per second at most (see progress.py)
             if event['status'] == 'scanning':
-                progress = event['current'] / event['total']
-                progress_bar.progress(progress)
-                status_text.text(f"Scanning: {event['item']} ({event['current']}/{event['total']})")
+                if event.get('total'):
+                    progress_bar.progress(event['current'] / event['total'])
+                eta = f", ~{event['eta']:,.0f}s left" if event.get('eta') is not None else ""
+                status_text.text(
+                    f"Scanning: {event['item']} ({event['dirs']:,} folders, "
+                    f"{event['files']:,} files, {scanner.format_size(event['bytes'])}, "
+                    f"{event['rate']:,.0f} folders/s{eta})"
+                )
         
         with st.spinner("Scanning folder..."):
-            scanner = FolderScanner(scan_folder)
-            results = scanner.scan(progress_callback)
+            # taken before the walk, so changes made during the scan count as changes
+            scan_fingerprint, scanned_at = folder_fingerprint(scan_folder), time.time()
+            scanner = FolderScanner(scan_folder, top_k=SCAN_TOP_K)
+            exporter = None
+            if export_choice in EXPORT_CHOICES:
+                _replace_export('scan_export')
+                exporter = ScanExporter(unique_export_path(EXPORT_DIR, EXPORT_CHOICES[export_choice]))
+            try:
+                results = scanner.scan(progress_callback, incremental=incremental_scan, workers=SCAN_WORKERS,
+                                       collect_table=True, exporter=exporter)
+            finally:
+                if exporter is not None:
+                    exporter.close()
             st.session_state.scan_results = results
+            st.session_state.scan_export = results.get('export')
+            # the dashboard reuses this instead of walking the folder again
+            st.session_state.scan_table = (os.path.abspath(scan_folder), scanner.file_table,
+                                           scan_fingerprint, scanned_at)
         
         st.success(f" Scan completed in {results['scan_time']:.2f} seconds!")
+        delta = results.get('delta')
+        if delta and not delta['baseline']:
+            st.info(
+                f" Since last scan: {len(delta['added'])} added, {len(delta['removed'])} removed, "
+                f"{len(delta['modified'])} modified ({delta['dirs_reused']:,} unchanged folders reused)"
+            )
         st.balloons()
     
     # Display results
@@ -528,6 +678,25 @@ elif st.session_state.current_view == 'scan':
                 st.info("No files found.")
         
         with tab2:
+            if results.get('duplicates') is not None:
+                st.markdown("#### Duplicates (verified by content)")
+                if results['duplicates']:
+                    st.info(f"Found {len(results['duplicates'])} groups of identical files")
+                    for idx, dup_group in enumerate(results['duplicates'][:10], 1):
+                        with st.expander(f"Group {idx}: {dup_group['count']} files of {dup_group['size_formatted']}"):
+                            for file_path in dup_group['files']:
+                                st.text(f" {file_path}")
+                else:
+                    st.success("No duplicate files found!")
+            elif st.button("Verify Duplicates by Content", key="verify_dups"):
+                with st.spinner("Hashing duplicate candidates..."):
+                    scanner = FolderScanner(scan_folder)
+                    scanner.scan_results = results
+                    found = scanner.find_duplicates()
+                if found['errors']:
+                    st.warning(f"Could not read {len(found['errors'])} files")
+                st.rerun()
+
             st.markdown("#### Potential Duplicates (by size)")
             if results['duplicate_candidates']:
                 st.info(f"Found {len(results['duplicate_candidates'])} groups of files with identical sizes")
@@ -582,19 +751,19 @@ elif st.session_state.current_view == 'scan':
                 st.success(" No errors encountered!")
     
     # Export functionality
+    if st.session_state.scan_export and os.path.exists(st.session_state.scan_export['path']):
+        export = st.session_state.scan_export
+        _download_link(export['path'], f"Download file list ({export['rows']:,} rows)", "application/gzip")
+
     if st.session_state.scan_results and 'export_button' in locals() and export_button:
         scanner = FolderScanner(scan_folder)
         scanner.scan_results = st.session_state.scan_results
-        success, message = scanner.export_results('scan_results.json')
+        _replace_export('summary_export')
+        success, message = scanner.export_results(unique_export_path(EXPORT_DIR, 'scan_results.json.gz'))
         if success:
+            st.session_state.summary_export = {"path": message}
             st.success(f" Results exported to {message}")
-            with open(message, 'r') as f:
-                st.download_button(
-                    label="Download JSON",
-                    data=f.read(),
-                    file_name="scan_results.json",
-                    mime="application/json"
-                )
+            _download_link(message, "Download JSON", "application/gzip")
         else:
             st.error(f"Export failed: {message}")
     
@@ -607,20 +776,45 @@ elif st.session_state.current_view == 'undo':
         st.rerun()
     
     st.markdown("<div class='content-card'>", unsafe_allow_html=True)
-    st.markdown("### ↩ Undo Last Operation")
-    st.info("ℹ This will restore all files from the last operation to their original locations.")
-    
-    undo_button = st.button("↩Undo Last Operation", key="undo_btn")
-    if undo_button:
-        try:
-            success = undo_last_operation()
-            if success:
-                st.success(" Files restored successfully!")
-                st.balloons()
-            else:
-                st.warning(" Nothing to undo.")
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
+    st.markdown("### ↩ Undo Operation")
+    st.info("ℹ This will restore the files of the selected operation to their original locations.")
+
+    runs = [r for r in reversed(list(load_history_index().values())) if not r["undone"]]
+    if not runs:
+        st.warning(" Nothing to undo.")
+    else:
+        labels = {r["run_id"]: f"{r['timestamp'][:19]} — {r['moves']:,} files" for r in runs}
+        run_id = st.selectbox("Operation", list(labels), format_func=labels.get)
+        pattern = st.text_input(" Only restore files matching (optional)", placeholder="e.g., *.pdf or */Downloads/*")
+
+        undo_button = st.button("↩ Undo Operation", key="undo_btn")
+        if undo_button:
+            select = None
+            if pattern:
+                select = lambda move: fnmatch.fnmatch(move["from"], pattern) or \
+                    fnmatch.fnmatch(os.path.basename(move["from"]), pattern)
+            progress_bar = st.progress(0)
+            try:
+                errors = []
+                error_count = 0
+                for event in throttle_events(undo_run(run_id, select=select)):
+                    if event.get("total"):
+                        progress_bar.progress(event["done"] / event["total"],
+                                              text=f"{event['done']:,} / {event['total']:,}{_eta_text(event)}")
+                    error_count = event["counts"].get("error", 0)
+                    if event["status"] == "error":
+                        errors.append(f"{event['file']}: {event['message']}")
+                    elif event["status"] == "warning":
+                        st.warning(event["message"])
+                    elif event["status"] == "done":
+                        st.success(f" {event['restored']:,} files restored"
+                                   + (f", {event['missing']:,} no longer there" if event["missing"] else ""))
+                if errors:
+                    st.error(f"{error_count:,} files could not be restored, e.g. {errors[0]}")
+                else:
+                    st.balloons()
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
     
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -636,10 +830,10 @@ elif st.session_state.current_view == 'schedule':
     # Instructions
     st.info("""
      **How to use:**
-    1. Enter folder path and times below
-    2. Click 'Save Schedule'
+    1. Enter folder path and times (or an interval / cron expression) below
+    2. Click 'Save Schedule' - every folder gets its own job
     3. Run `python run_scheduled.py` in terminal
-    4. Keep the terminal open - your schedule is running!
+    4. Keep the terminal open - all your jobs are running!
     """)
     
     # Configuration
@@ -685,19 +879,38 @@ elif st.session_state.current_view == 'schedule':
             st.success(f"Removed {time_to_remove}")
             st.rerun()
 
+    col_every, col_cron = st.columns(2)
+    sched_every = col_every.text_input("Or run every", placeholder="e.g., 15m, 2h", help="Interval in s, m, h or d")
+    sched_cron = col_cron.text_input("Or cron expression", placeholder="e.g., */30 8-18 * * 1-5",
+                                     help="minute hour day month weekday")
+
     # Save button
     if st.button("Save Schedule", type="primary"):
+        job = {"name": os.path.basename(os.path.normpath(sched_folder)) if sched_folder else "",
+               "folder": sched_folder, "times": st.session_state.scheduled_times}
+        if sched_every.strip():
+            job["every"] = sched_every.strip()
+        if sched_cron.strip():
+            job["cron"] = sched_cron.strip()
+        try:
+            JobSchedule(job)
+            schedule_error = None
+        except ValueError as e:
+            schedule_error = str(e)
+
         if not sched_folder or not os.path.isdir(sched_folder):
             st.error(" Please enter a valid folder path!")
-        elif not st.session_state.scheduled_times:
-            st.warning(" Please add at least one time!")
+        elif not (job["times"] or sched_every.strip() or sched_cron.strip()):
+            st.warning(" Please add at least one time, an interval or a cron expression!")
+        elif schedule_error:
+            st.error(f" {schedule_error}")
         else:
-            st.session_state.scheduled_job = {
-                "folder": sched_folder, 
-                "times": st.session_state.scheduled_times
-            }
-            with open("scheduled_jobs.json", "w") as f:
-                json.dump(st.session_state.scheduled_job, f, indent=2)
+            jobs = load_jobs() if os.path.exists(JOBS_FILE) else []
+            # one job per folder: saving again replaces it
+            jobs = [j for j in jobs if os.path.abspath(j.get("folder", "")) != os.path.abspath(sched_folder)]
+            jobs.append(job)
+            save_jobs(jobs)
+            st.session_state.scheduled_job = job
             
             st.success(" Schedule saved successfully!")
             st.balloons()
@@ -709,16 +922,23 @@ elif st.session_state.current_view == 'schedule':
             st.markdown("Run this command in your terminal to start scheduling!")
     
     # Show current schedule if exists
-    if os.path.exists("scheduled_jobs.json"):
+    if os.path.exists(JOBS_FILE):
         st.markdown("---")
         st.markdown("### Current Schedule")
         try:
-            with open("scheduled_jobs.json", "r") as f:
-                current_schedule = json.load(f)
-            
-            st.markdown(f"**Folder:** `{current_schedule.get('folder', 'Not set')}`")
-            st.markdown(f"**Times:** {', '.join(current_schedule.get('times', []))}")
-        except:
+            jobs = load_jobs()
+            for job in jobs:
+                when = [", ".join(job.get("times", []))] if job.get("times") else []
+                if job.get("every"):
+                    when.append(f"every {job['every']}")
+                if job.get("cron"):
+                    when.append(f"cron `{job['cron']}`")
+                col_job, col_remove = st.columns([5, 1])
+                col_job.markdown(f"**{job['name']}** — `{job.get('folder', 'Not set')}` — {' | '.join(when)}")
+                if col_remove.button("🗑️", key=f"remove_job_{job['name']}_{job.get('folder')}"):
+                    save_jobs([j for j in jobs if j is not job])
+                    st.rerun()
+        except (OSError, ValueError):
             st.error("Error reading schedule file")
     
     st.markdown("</div>", unsafe_allow_html=True)
@@ -734,20 +954,31 @@ elif st.session_state.current_view == 'dashboard':
 
     folder = st.text_input("Enter folder path to analyze:")
     if folder and os.path.exists(folder):
-        df = scan_directory(folder)
-        st.success(f"Analyzed {len(df)} files.")
-
-        # File Type Distribution
-        st.subheader(" File Type Distribution")
-        file_type_data = get_file_type_distribution(df)
-        fig = px.pie(values=file_type_data.values, names=file_type_data.index, title="File Type Distribution")
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Folder Size Distribution
-        st.subheader("Folder Size Overview (MB)")
-        folder_sizes = get_folder_size_distribution(df)
-        fig2 = px.bar(x=folder_sizes.index[:10], y=folder_sizes.values[:10], title="Top 10 Largest Folders")
-        st.plotly_chart(fig2, use_container_width=True)
+        analytics_cache = get_analytics_cache()
+        scan_table = st.session_state.scan_table
+        if scan_table and scan_table[0] == os.path.abspath(folder):
+            _, table, fingerprint, scanned_at = scan_table
+            if not analytics_cache.adopt(folder, table, fingerprint, scanned_at):
+                # folder changed or the scan is too old: walk it again instead
+                st.session_state.scan_table = None
+        job = analytics_cache.get(folder)
+
+        if job.status == "running":
+            files, file_types, folder_sizes = job.partial()
+            st.info(f"Analyzing in the background... {files:,} files so far")
+            if files:
+                render_dashboard_charts(
+                    pd.Series(file_types).sort_values(ascending=False),
+                    pd.Series(folder_sizes).sort_values(ascending=False)
+                )
+            time.sleep(1)
+            st.rerun()
+        elif job.status == "error":
+            st.error(f"Analysis failed: {job.error}")
+        else:
+            analysis = job.result
+            st.success(f"Analyzed {len(analysis['df'])} files.")
+            render_dashboard_charts(analysis['file_types'], analysis['folder_sizes'])
     
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -1,78 +1,372 @@
 import json
 import os
-from datetime import datetime
+import errno
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-HISTORY_FILE = "history.json"
+from mover import copy_move
 
-def save_history(run_id, moves_list):
-    history = []
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+# Append-only journal: one JSON line per run (plus small "undone" markers).
+# The index holds one short line per run with the byte offset of its record,
+# so saving a run costs O(moves in that run) and loading one is a single seek.
+HISTORY_FILE = "history.jsonl"
+INDEX_FILE = "history_index.jsonl"
+LEGACY_HISTORY_FILE = "history.json"   # old rewrite-on-every-run format
+LOCK_FILE = "history.lock"             # serialises writers across processes (GUI, scheduler)
+
+RETENTION_DAYS = 180          # runs older than this are dropped on compaction
+MAX_RUNS = 1000               # at most this many runs are kept
+COMPACT_MIN_BYTES = 1 << 20   # never compact a journal smaller than this
+
+UNDO_WORKERS = 8              # threads restoring files
+UNDO_BATCH = 500              # moves per undo task
+
+_thread_lock = threading.RLock()
+_lock_depth = 0
 
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
+@contextmanager
+def _history_lock():
+    """
+    Exclusive access to the journal and index: a thread lock plus a file
+    lock, since scheduled jobs run on threads and the GUI and the scheduler
+    are separate processes. Re-entrant within a thread.
+    """
+    global _lock_depth
+    with _thread_lock:
+        if _lock_depth:
+            _lock_depth += 1
             try:
+                yield
+            finally:
+                _lock_depth -= 1
+            return
+        with open(LOCK_FILE, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            _lock_depth = 1
+            try:
+                yield
+            finally:
+                _lock_depth = 0
+                # closing the file releases the lock
+
+def _append_line(path, record):
+    """Append one JSON line; (offset, length). Call with _history_lock held."""
+    data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    with open(path, "ab") as f:
+        f.write(data)
+        end = f.tell()
+    return end - len(data), len(data)
+
+def _read_lines(path):
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            start, offset = offset, offset + len(line)
+            try:
+                yield start, len(line), json.loads(line)
+            except ValueError:
+                # torn write at the end of the file
+                continue
+
+def _rebuild_index():
+    """Recreate the index from the journal (missing or lost index file)."""
+    with _history_lock():
+        return _rebuild_index_locked()
+
+def _rebuild_index_locked():
+    runs = {}
+    for offset, length, record in _read_lines(HISTORY_FILE):
+        if "moves" in record:
+            runs[record["run_id"]] = {
+                "run_id": record["run_id"],
+                "timestamp": record["timestamp"],
+                "offset": offset,
+                "length": length,
+                "moves": len(record["moves"]),
+                "undone": record.get("undone", False),
+            }
+        elif record.get("undone") and record.get("run_id") in runs:
+            runs[record["run_id"]]["undone"] = True
+    _write_index(INDEX_FILE, runs.values())
+    return runs
+
+def _write_index(path, entries):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+def _migrate_legacy():
+    """Move runs from the old history.json into the journal, once."""
+    if not os.path.exists(LEGACY_HISTORY_FILE):
+        return
+    with _history_lock():
+        # checked again under the lock: another writer may have migrated already
+        if not os.path.exists(LEGACY_HISTORY_FILE) or os.path.exists(HISTORY_FILE):
+            return
+        try:
+            with open(LEGACY_HISTORY_FILE, "r", encoding="utf-8") as f:
                 history = json.load(f)
-            except json.JSONDecodeError:
-                history = []
+        except (OSError, json.JSONDecodeError):
+            return
+        for run_entry in history:
+            _append_run(run_entry)
+        os.replace(LEGACY_HISTORY_FILE, LEGACY_HISTORY_FILE + ".migrated")
+
+def _append_run(run_entry):
+    with _history_lock():
+        offset, length = _append_line(HISTORY_FILE, run_entry)
+        _append_line(INDEX_FILE, {
+            "run_id": run_entry["run_id"],
+            "timestamp": run_entry["timestamp"],
+            "offset": offset,
+            "length": length,
+            "moves": len(run_entry["moves"]),
+            "undone": run_entry.get("undone", False),
+        })
+
+def load_history_index():
+    """
+    {run_id: {"run_id", "timestamp", "offset", "length", "moves", "undone"}}
+    for every stored run, oldest first. Reads only the index, not the moves.
+    """
+    _migrate_legacy()
+    with _history_lock():
+        if not os.path.exists(INDEX_FILE):
+            return _rebuild_index_locked() if os.path.exists(HISTORY_FILE) else {}
+        runs = {}
+        for _, _, record in _read_lines(INDEX_FILE):
+            if "offset" in record:
+                runs[record["run_id"]] = record
+            elif record.get("undone") and record.get("run_id") in runs:
+                runs[record["run_id"]]["undone"] = True
+        return runs
+
+def load_run(run_id, index=None):
+    """
+    Full run entry ({"run_id", "timestamp", "moves", "undone"}) or None.
+    A passed-in index may be stale (e.g. compacted since), so the index is
+    re-read under the lock whenever the record does not match.
+    """
+    with _history_lock():
+        for fresh in (False, True):
+            if fresh or index is None:
+                index = load_history_index()
+            entry = index.get(run_id)
+            if entry is None:
+                return None
+            with open(HISTORY_FILE, "rb") as f:
+                f.seek(entry["offset"])
+                data = f.read(entry["length"])
+            try:
+                run_entry = json.loads(data)
+            except ValueError:
+                continue
+            if run_entry.get("run_id") == run_id:
+                run_entry["undone"] = entry["undone"]
+                return run_entry
+        raise ValueError(f"History index does not match the journal for run {run_id}")
 
+def mark_undone(run_id):
+    """Flag a run as undone by appending a marker (nothing is rewritten)."""
+    record = {"run_id": run_id, "undone": True}
+    with _history_lock():
+        _append_line(HISTORY_FILE, record)
+        _append_line(INDEX_FILE, record)
+
+def save_history(run_id, moves_list):
+    _migrate_legacy()
     run_entry = {
         "run_id": run_id,
         "timestamp": datetime.now().isoformat(),
         "moves": moves_list,
         "undone": False
     }
+    _append_run(run_entry)
+    maybe_compact_history()
+
+def _expired(index, retention_days=RETENTION_DAYS, max_runs=MAX_RUNS):
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    run_ids = list(index)
+    expired = set(run_ids[:max(0, len(run_ids) - max_runs)])
+    expired.update(r for r in run_ids if index[r]["timestamp"] < cutoff)
+    return expired
+
+def maybe_compact_history():
+    """
+    Compact once the journal holds more dead bytes (expired runs, markers,
+    torn writes) than live ones, so compaction cost is amortised over the
+    runs that produced the garbage.
+    """
+    if not os.path.exists(HISTORY_FILE) or os.path.getsize(HISTORY_FILE) < COMPACT_MIN_BYTES:
+        return False
+    with _history_lock():
+        total = os.path.getsize(HISTORY_FILE)
+        index = load_history_index()
+        expired = _expired(index)
+        live = sum(e["length"] for r, e in index.items() if r not in expired)
+        if total - live <= live:
+            return False
+        compact_history()
+        return True
 
-    history.append(run_entry)
+def compact_history(retention_days=RETENTION_DAYS, max_runs=MAX_RUNS):
+    """Rewrite the journal and index with only the runs still retained."""
+    with _history_lock():
+        # the index is read under the lock, so no run appended meanwhile is lost
+        _compact_locked(load_history_index(), retention_days, max_runs)
 
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=4)
+def _compact_locked(index, retention_days, max_runs):
+    expired = _expired(index, retention_days, max_runs)
+    tmp = HISTORY_FILE + ".tmp"
+    entries = []
+    with open(HISTORY_FILE, "rb") as src, open(tmp, "wb") as dst:
+        for run_id, entry in index.items():
+            if run_id in expired:
+                continue
+            src.seek(entry["offset"])
+            record = json.loads(src.read(entry["length"]))
+            record["undone"] = entry["undone"]
+            data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            entries.append(dict(entry, offset=dst.tell(), length=len(data)))
+            dst.write(data)
+        dst.flush()
+        os.fsync(dst.fileno())
+    # without an index the journal is re-indexed on load, so a crash between
+    # the two replaces can never leave offsets pointing into the wrong file
+    if os.path.exists(INDEX_FILE):
+        os.remove(INDEX_FILE)
+    os.replace(tmp, HISTORY_FILE)
+    _write_index(INDEX_FILE, entries)
 
 def load_last_history():
-    if not os.path.exists(HISTORY_FILE):
-        return None
+    for entry in reversed(list(load_history_index().values())):
+        if not entry["undone"]:
+            return load_run(entry["run_id"])
+    return None
 
-    with open(HISTORY_FILE, "r", encoding="utf-8") as f:
+def _restore_batch(batch):
+    """Move a batch of files back; returns [(move, status, error)]."""
+    results = []
+    for move in batch:
+        src, dest = move["to"], move["from"]
         try:
-            history = json.load(f)
-            if not history:
-                return None
-            for run_entry in reversed(history):
-                if not run_entry.get("undone", False):
-                    return run_entry
-            return None
-        except json.JSONDecodeError:
-            return None
+            if not os.path.lexists(src):
+                results.append((move, "missing", None))
+                continue
+            if os.path.lexists(dest):
+                results.append((move, "error", f"{dest} already exists"))
+                continue
+            try:
+                os.rename(src, dest)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                copy_move(src, dest)
+            results.append((move, "restored", None))
+        except OSError as e:
+            results.append((move, "error", str(e)))
+    return results
 
-def undo_last_operation():
-    last_run = load_last_history()
-    if not last_run:
-        print("No history available to undo.")
-        return False
+def undo_run(run_id=None, select=None, workers=UNDO_WORKERS, batch_size=UNDO_BATCH):
+    """
+    Undo a run (the last one not undone yet when run_id is None).
+    select(move) -> bool restricts the undo to some of its moves; the run is
+    only marked undone when all of it was undone.
+    Original folders are created once up front, then renames run in batches
+    on `workers` threads. Yields dicts like organize_directory:
+        {"status": "restored" | "missing" | "error", "file": ..., "done": i, "total": n}
+    followed by {"status": "done", "restored", "missing", "errors", "run_id"}.
+    """
+    run = load_last_history() if run_id is None else load_run(run_id)
+    if not run:
+        yield {"status": "warning", "message": "No history available to undo."}
+        return
+    if run["undone"]:
+        yield {"status": "warning", "message": f"Run {run['run_id']} was already undone."}
+        return
 
-    moves = last_run["moves"]
-    errors = 0
+    moves = run["moves"]
+    if select is not None:
+        moves = [m for m in moves if select(m)]
+    # newest first, as the moves were made
+    moves = moves[::-1]
+    total = len(moves)
 
-    for move in reversed(moves):
-        src = move["to"]
-        dest = move["from"]
+    failed_dirs = {}
+    for folder in {os.path.dirname(m["from"]) for m in moves}:
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as e:
+            failed_dirs[folder] = str(e)
 
-        if os.path.exists(src):
-            try:
-                os.makedirs(os.path.dirname(dest), exist_ok=True)
-                os.rename(src, dest)
-            except Exception as e:
-                print(f"Failed to undo {src} → {dest}: {e}")
-                errors += 1
+    counts = {"restored": 0, "missing": 0, "error": 0}
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
 
-    # Mark run as undone
-    with open(HISTORY_FILE, "r+", encoding="utf-8") as f:
-        history = json.load(f)
-        for run_entry in history:
-            if run_entry["run_id"] == last_run["run_id"]:
-                run_entry["undone"] = True
-                break
-        f.seek(0)
-        json.dump(history, f, indent=4)
-        f.truncate()
+        def finished(futures):
+            nonlocal done
+            for fut in futures:
+                for move, status, error in fut.result():
+                    done += 1
+                    counts[status] += 1
+                    event = {"status": status, "file": os.path.basename(move["from"]), "done": done, "total": total}
+                    if error:
+                        event["message"] = error
+                    yield event
+
+        batch = []
+        for move in moves:
+            folder_error = failed_dirs.get(os.path.dirname(move["from"]))
+            if folder_error:
+                done += 1
+                counts["error"] += 1
+                yield {"status": "error", "file": os.path.basename(move["from"]), "message": folder_error,
+                       "done": done, "total": total}
+                continue
+            batch.append(move)
+            if len(batch) >= batch_size:
+                pending.add(pool.submit(_restore_batch, batch))
+                batch = []
+                if len(pending) >= workers * 2:
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from finished(completed)
+        if batch:
+            pending.add(pool.submit(_restore_batch, batch))
+        while pending:
+            completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finished(completed)
+
+    if select is None:
+        mark_undone(run["run_id"])
+    yield {"status": "done", "restored": counts["restored"], "missing": counts["missing"],
+           "errors": counts["error"], "run_id": run["run_id"]}
+
+def undo_last_operation():
+    errors = 0
+    for event in undo_run():
+        if event["status"] == "warning":
+            print(event["message"])
+            return False
+        if event["status"] == "error":
+            print(f"Failed to undo {event['file']}: {event['message']}")
+            errors += 1
 
     print(f"✅ Undo complete with {errors} errors.")
     return True
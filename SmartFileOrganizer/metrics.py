@@ -0,0 +1,103 @@
+# metrics.py
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+class Metrics:
+    """
+    Per-run instrumentation: seconds spent per phase plus plain counters
+    (files, bytes, syscalls). Cheap enough to stay on for every run; safe to
+    update from worker threads.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def timed_iter(self, phase, iterable):
+        """Yield from iterable, charging the time spent producing items to phase."""
+        it = iter(iterable)
+        clock = time.perf_counter
+        spent = 0.0
+        try:
+            while True:
+                start = clock()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    spent += clock() - start
+                yield item
+        finally:
+            self.add_time(phase, spent)
+
+    def as_dict(self):
+        """{"total_seconds", "phases": {phase: seconds}, "counts": {name: n}}"""
+        with self._lock:
+            return {
+                "total_seconds": round(time.perf_counter() - self._start, 6),
+                "phases": {k: round(v, 6) for k, v in self.phases.items()},
+                "counts": dict(self.counts),
+            }
+
+
+def _labels(labels):
+    parts = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def to_prometheus(samples, prefix="smartfileorganizer"):
+    """
+    Prometheus text format for [(labels, metrics dict)], e.g. one sample per
+    scheduled job with its last run's metrics.
+    """
+    lines = [
+        f"# TYPE {prefix}_run_seconds gauge",
+        f"# TYPE {prefix}_phase_seconds gauge",
+        f"# TYPE {prefix}_count gauge",
+    ]
+    for labels, metrics in samples:
+        lines.append(f"{prefix}_run_seconds{_labels(labels)} {metrics['total_seconds']}")
+        for phase, seconds in sorted(metrics["phases"].items()):
+            lines.append(f"{prefix}_phase_seconds{_labels(dict(labels, phase=phase))} {seconds}")
+        for name, value in sorted(metrics["counts"].items()):
+            lines.append(f"{prefix}_count{_labels(dict(labels, name=name))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, samples):
+    """Replace a node_exporter textfile-collector file atomically."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(to_prometheus(samples))
+    os.replace(tmp, path)
+
+
+def append_jsonl(path, record):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -0,0 +1,301 @@
+# move_journal.py
+import os
+import json
+import time
+import errno
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+from mover import COPY_WORKERS, copy_move, execute_moves
+from history_store import save_history
+
+JOURNAL_FOLDER = "journal"
+JOURNAL_BATCH = 1000     # move intents written per fsync
+
+# Journal layout, one file per organize run (<run_id>.wal):
+#   {"run_id": ..., "folder": ..., "timestamp": ...}   header line
+#   ["src", "dst"]                                     one line per planned move
+# The file is deleted once the run is in the history. While a run (or a
+# recovery) is active its process holds an exclusive lock on the file, so a
+# file that is there and unlocked belongs to an interrupted run.
+
+
+def _fsync_dir(folder):
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return   # e.g. Windows, where directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _try_lock(f):
+    """Exclusive, non-blocking lock on an open journal; False if someone else holds it."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _remove_locked(f, path):
+    """Delete a journal, keeping the lock until it is gone where the OS allows that."""
+    if os.name == "nt":
+        # open files cannot be deleted on Windows
+        f.close()
+        os.remove(path)
+    else:
+        os.remove(path)
+        f.close()
+
+
+class MoveJournal:
+    """
+    Write-ahead log of the moves of one organize run. guard() records each
+    batch of planned moves and fsyncs it once before letting the batch
+    through to the mover, so every move that may have happened is on disk.
+    """
+
+    def __init__(self, run_id, folder, batch_size=JOURNAL_BATCH, journal_folder=JOURNAL_FOLDER, metrics=None):
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.metrics = metrics
+        os.makedirs(journal_folder, exist_ok=True)
+        self.path = os.path.join(journal_folder, f"{run_id}.wal")
+        self._file = open(self.path, "ab")
+        if not _try_lock(self._file):
+            self._file.close()
+            raise RuntimeError(f"journal {self.path} is locked by another process")
+        header = {"run_id": run_id, "folder": os.path.abspath(folder), "timestamp": datetime.now().isoformat()}
+        self._write([header])
+        _fsync_dir(journal_folder)
+
+    def _write(self, records):
+        start = time.perf_counter()
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        self._file.write(data.encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self.metrics is not None:
+            self.metrics.add_time("journal", time.perf_counter() - start)
+            self.metrics.count("fsync")
+
+    def guard(self, items):
+        """Pass plan items through, journaling each batch of moves first."""
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield from self._flush(batch)
+                batch = []
+        yield from self._flush(batch)
+
+    def _flush(self, batch):
+        intents = [[item["src"], item["dst"]] for item in batch if "src" in item]
+        if intents:
+            self._write(intents)
+        return batch
+
+    def close(self):
+        """Stop writing and release the lock; the journal stays on disk for recovery."""
+        if not self._file.closed:
+            self._file.close()
+
+    def commit(self):
+        """The run is in the history: the journal is no longer needed."""
+        _remove_locked(self._file, self.path)
+
+
+def _read_journal(f):
+    header, intents = None, []
+    f.seek(0)
+    for line in f:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # torn write: that batch never reached the mover
+            break
+        if header is None:
+            header = record
+        else:
+            intents.append(record)
+    return header, intents
+
+
+def interrupted_runs(journal_folder=JOURNAL_FOLDER):
+    """
+    Runs that were cut short: [{"run_id", "folder", "timestamp", "moves"}].
+    Journals locked by a run (or recovery) still in progress are left out.
+    """
+    if not os.path.isdir(journal_folder):
+        return []
+    runs = []
+    for name in sorted(os.listdir(journal_folder)):
+        if not name.endswith(".wal"):
+            continue
+        try:
+            with open(os.path.join(journal_folder, name), "rb") as f:
+                if not _try_lock(f):
+                    continue
+                header, intents = _read_journal(f)
+        except OSError:
+            continue
+        if header is None:
+            continue
+        runs.append(dict(header, moves=len(intents)))
+    return runs
+
+
+def _lstat(path):
+    try:
+        return os.lstat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _move_state(src, dst, started):
+    """
+    "moved", "pending", "missing", "partial" or "conflict".
+    When both files exist, dst is only a cut-short cross-device copy
+    ("partial", safe to delete) if it is on another device, smaller than
+    src and was written after the run started (copy_move sets the original
+    mtime only once the copy is complete). Anything else, e.g. a new file
+    with the same name that arrived after the move finished, is a
+    "conflict" and neither file may be touched.
+    """
+    src_st, dst_st = _lstat(src), _lstat(dst)
+    if dst_st is None:
+        return "pending" if src_st is not None else "missing"
+    if src_st is None:
+        return "moved"
+    if (dst_st.st_dev != src_st.st_dev and dst_st.st_size < src_st.st_size
+            and dst_st.st_mtime >= started):
+        return "partial"
+    return "conflict"
+
+
+def _open_run(run_id, journal_folder):
+    """
+    Open and lock a journal for recovery: (file, path, header, intents), or
+    None when another process holds it (the run is still going).
+    """
+    path = os.path.join(journal_folder, f"{run_id}.wal")
+    f = open(path, "rb")
+    if not _try_lock(f):
+        f.close()
+        return None
+    header, intents = _read_journal(f)
+    return f, path, header, intents
+
+
+def _started(header):
+    """Run start as a timestamp, a little early to allow for clock granularity."""
+    return datetime.fromisoformat(header["timestamp"]).timestamp() - 2
+
+
+def resume_run(run_id, workers=COPY_WORKERS, journal_folder=JOURNAL_FOLDER):
+    """
+    Finish an interrupted run: execute the journaled moves that did not
+    happen yet and record the whole run in the history under its run id.
+    Yields organize_directory-style events. When both the source and the
+    destination of a move exist (see _move_state) neither is touched: the
+    destination is recorded as moved and the source reported as skipped.
+    """
+    opened = _open_run(run_id, journal_folder)
+    if opened is None:
+        yield {"status": "warning", "message": f"Run {run_id} is still in progress."}
+        return
+    f, path, header, intents = opened
+    try:
+        started = _started(header)
+        moved_files = []
+        pending = []
+        for src, dst in intents:
+            state = _move_state(src, dst, started)
+            if state == "moved":
+                moved_files.append({"from": src, "to": dst})
+            elif state == "conflict":
+                moved_files.append({"from": src, "to": dst})
+                yield {"status": "skipped", "file": os.path.basename(src),
+                       "reason": f"{dst} already exists, left both files alone"}
+            elif state == "partial":
+                os.remove(dst)
+                pending.append({"file": os.path.basename(src), "src": src, "dst": dst})
+            elif state == "pending":
+                pending.append({"file": os.path.basename(src), "src": src, "dst": dst})
+
+        total = len(pending)
+        for done, (item, error) in enumerate(execute_moves(pending, workers), 1):
+            if error is not None:
+                yield {"status": "error", "file": item["file"], "message": str(error), "done": done, "total": total}
+            else:
+                moved_files.append({"from": item["src"], "to": item["dst"]})
+                yield {"status": "moved", "file": item["file"], "done": done, "total": total}
+
+        if moved_files:
+            save_history(run_id, moved_files)
+        _remove_locked(f, path)
+    finally:
+        f.close()
+    yield {"status": "done", "moved": len(moved_files), "run_id": run_id}
+
+
+def rollback_run(run_id, journal_folder=JOURNAL_FOLDER):
+    """
+    Put every file of an interrupted run back where it was and drop the
+    journal. Yields organize_directory-style events. Moves whose source and
+    destination both exist (see _move_state) are reported as errors and left
+    alone, and the journal is kept so the rollback can be retried once they
+    are sorted out.
+    """
+    opened = _open_run(run_id, journal_folder)
+    if opened is None:
+        yield {"status": "warning", "message": f"Run {run_id} is still in progress."}
+        return
+    f, path, header, intents = opened
+    try:
+        started = _started(header)
+        total = len(intents)
+        restored = errors = 0
+        for done, (src, dst) in enumerate(reversed(intents), 1):
+            state = _move_state(src, dst, started)
+            try:
+                if state == "moved":
+                    os.makedirs(os.path.dirname(src), exist_ok=True)
+                    try:
+                        os.rename(dst, src)
+                    except OSError as e:
+                        if e.errno != errno.EXDEV:
+                            raise
+                        copy_move(dst, src)
+                    restored += 1
+                    yield {"status": "restored", "file": os.path.basename(src), "done": done, "total": total}
+                elif state == "partial":
+                    os.remove(dst)
+                elif state == "conflict":
+                    errors += 1
+                    yield {"status": "error", "file": os.path.basename(src),
+                           "message": f"both {src} and {dst} exist, left both files alone",
+                           "done": done, "total": total}
+            except OSError as e:
+                errors += 1
+                yield {"status": "error", "file": os.path.basename(src), "message": str(e), "done": done, "total": total}
+        if not errors:
+            # keep the journal otherwise, so the rollback can be retried
+            _remove_locked(f, path)
+    finally:
+        f.close()
+    yield {"status": "done", "restored": restored, "errors": errors, "run_id": run_id}
@@ -0,0 +1,148 @@
+# mover.py
+import os
+import errno
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+COPY_WORKERS = 4                 # concurrent cross-device copies
+COPY_CHUNK = 8 * 1024 * 1024     # bytes per copy_file_range/sendfile call
+
+# errors meaning "this kernel/filesystem can't do it", so try the next method
+_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP,
+                errno.EBADF, errno.ENOTSOCK}
+
+
+def _copy_range(fsrc, fdst):
+    while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_CHUNK):
+        pass
+
+
+def _copy_sendfile(fsrc, fdst):
+    offset = 0
+    while True:
+        sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, COPY_CHUNK)
+        if not sent:
+            break
+        offset += sent
+
+
+def _copy_data(fsrc, fdst):
+    """Copy file contents in the kernel when possible, else with large buffered reads."""
+    for method in (
+        _copy_range if hasattr(os, "copy_file_range") else None,
+        _copy_sendfile if hasattr(os, "sendfile") else None,
+    ):
+        if method is None:
+            continue
+        try:
+            method(fsrc, fdst)
+            return
+        except OSError as e:
+            # only fall back if nothing was written yet
+            if e.errno not in _UNSUPPORTED or fdst.tell() != 0:
+                raise
+            fsrc.seek(0)
+    shutil.copyfileobj(fsrc, fdst, COPY_CHUNK)
+
+
+def copy_move(src, dst):
+    """
+    Move across filesystems: chunked copy, copy metadata, then delete src.
+    A symlink is recreated as a symlink to the same target, not copied as
+    the file it points to. Returns the number of bytes copied.
+    """
+    if os.path.islink(src):
+        os.symlink(os.readlink(src), dst, target_is_directory=os.path.isdir(src))
+        os.unlink(src)
+        return 0
+    try:
+        with open(src, "rb") as fsrc, open(dst, "xb") as fdst:
+            _copy_data(fsrc, fdst)
+            copied = fdst.tell()
+        shutil.copystat(src, dst)
+    except BaseException:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        raise
+    os.unlink(src)
+    return copied
+
+
+class _DeviceCache:
+    """st_dev per folder, so same-filesystem checks cost one stat per folder."""
+
+    def __init__(self):
+        self._devices = {}
+
+    def device(self, folder):
+        dev = self._devices.get(folder)
+        if dev is None:
+            dev = self._devices[folder] = os.stat(folder).st_dev
+        return dev
+
+    def same_device(self, src, dst):
+        try:
+            return self.device(os.path.dirname(src) or ".") == self.device(os.path.dirname(dst) or ".")
+        except OSError:
+            return False
+
+
+def _timed_copy(src, dst, metrics):
+    start = time.perf_counter()
+    copied = copy_move(src, dst)
+    metrics.add_time("copy", time.perf_counter() - start)
+    metrics.count("copies")
+    metrics.count("bytes_copied", copied)
+    return copied
+
+
+def execute_moves(items, workers=COPY_WORKERS, metrics=None):
+    """
+    Execute planned moves ({"src", "dst", ...} dicts). Same-filesystem moves
+    are a plain os.rename in the calling thread; cross-device moves run on a
+    bounded thread pool as chunked copies. Items without "src" (skips) are
+    passed straight through.
+    Yields (item, error) as moves finish; error is None on success.
+    metrics (a metrics.Metrics) gets rename/copy timings, counts and bytes.
+    """
+    devices = _DeviceCache()
+    copy = copy_move if metrics is None else lambda src, dst: _timed_copy(src, dst, metrics)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def drain(block):
+            if not pending:
+                return
+            done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for fut in done:
+                item = pending.pop(fut)
+                error = fut.exception()
+                yield item, error
+
+        for item in items:
+            if "src" not in item:
+                yield item, None
+            elif devices.same_device(item["src"], item["dst"]):
+                start = time.perf_counter()
+                try:
+                    os.rename(item["src"], item["dst"])
+                    error = None
+                except OSError as e:
+                    error = e
+                if metrics is not None:
+                    metrics.add_time("rename", time.perf_counter() - start)
+                    metrics.count("renames")
+                if error is not None and error.errno == errno.EXDEV:
+                    # e.g. a bind mount: same st_dev, different mount
+                    pending[pool.submit(copy, item["src"], item["dst"])] = item
+                else:
+                    yield item, error
+            else:
+                pending[pool.submit(copy, item["src"], item["dst"])] = item
+            yield from drain(block=len(pending) >= workers * 2)
+
+        while pending:
+            yield from drain(block=True)
@@ -0,0 +1,63 @@
+# progress.py
+import time
+
+PROGRESS_INTERVAL = 0.2   # seconds between progress updates (at most 5 per second)
+PASS_ERRORS = 20          # error events passed through unthrottled before they are thinned too
+
+
+class ProgressThrottle:
+    """
+    Rate limiter for progress reports. ready() is true at most once every
+    `interval` seconds, or every `every` items when that is given, so the
+    cost of updating a UI does not grow with the number of files.
+    stats() adds elapsed time, throughput and (when the total is known) ETA.
+    """
+
+    def __init__(self, interval=PROGRESS_INTERVAL, every=None):
+        self.interval = interval
+        self.every = every
+        self.start = time.monotonic()
+        self._next_time = self.start
+        self._next_count = 0
+
+    def ready(self, done):
+        if self.every is not None:
+            if done >= self._next_count:
+                self._next_count = done + self.every
+                return True
+            return False
+        now = time.monotonic()
+        if now >= self._next_time:
+            self._next_time = now + self.interval
+            return True
+        return False
+
+    def stats(self, done, total=None):
+        """{"elapsed", "rate" (items/s), "eta" (seconds, None if unknown)}"""
+        elapsed = time.monotonic() - self.start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if total and rate:
+            eta = round(max(total - done, 0) / rate, 1)
+        return {"elapsed": round(elapsed, 3), "rate": round(rate, 1), "eta": eta}
+
+
+def throttle_events(events, interval=PROGRESS_INTERVAL, every=None, pass_errors=PASS_ERRORS):
+    """
+    Thin out an organize/undo event stream for display. "warning" and
+    "done" events and the first `pass_errors` errors always pass; the rest
+    at most once per interval. Every event passed on is a copy carrying
+    "counts" ({status: n} over all events so far) plus elapsed/rate/eta,
+    so the consumer does not need to see the events that were dropped.
+    """
+    throttle = ProgressThrottle(interval, every)
+    counts = {}
+    seen = 0
+    for event in events:
+        status = event.get("status")
+        counts[status] = counts.get(status, 0) + 1
+        seen += 1
+        always = status in ("warning", "done") or (status == "error" and counts["error"] <= pass_errors)
+        if always or throttle.ready(seen):
+            done = event.get("done", seen)
+            yield dict(event, counts=dict(counts), **throttle.stats(done, event.get("total")))
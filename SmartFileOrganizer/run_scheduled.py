@@ -1,49 +1,109 @@
 """
 simple_scheduler.py - Just run this file, it will do everything!
+Runs every job in scheduled_jobs.json (see scheduler.py for the format).
+Run with --watch to organize new files as they arrive instead of at fixed times.
+Run with --metrics FILE to export run metrics: Prometheus text for a .prom
+file (node_exporter textfile collector), JSON lines otherwise.
+Only run summaries and errors are printed; add --verbose to see every file.
+Progress summaries also go to logs/organizer.log (--log-level 0-2).
 """
 
-import schedule
-import time
-import json
 import os
+import argparse
+import threading
 from datetime import datetime
 
-def organize_now(folder):
-    """Run the organizer"""
-    print(f"\n{'='*60}")
-    print(f"🟢 Starting organization at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"📂 Folder: {folder}")
-    print(f"{'='*60}\n")
-    
-    try:
-        from file_organizer import organize_directory
-        
-        moved = 0
-        skipped = 0
-        errors = 0
-        
-        for event in organize_directory(folder):
-            status = event.get("status", "")
-            if status == "moved":
-                print(f"✅ Moved: {event.get('file', '')} → {event.get('category', '')}")
-                moved += 1
-            elif status == "skipped":
-                print(f"⚠️  Skipped: {event.get('file', '')} - {event.get('reason', '')}")
-                skipped += 1
-            elif status == "error":
-                print(f"❌ Error: {event.get('file', '')} - {event.get('message', '')}")
-                errors += 1
-        
-        print(f"\n{'='*60}")
-        print(f"✅ Done! Moved: {moved} | Skipped: {skipped} | Errors: {errors}")
-        print(f"{'='*60}\n")
-        
-    except Exception as e:
-        print(f"❌ Error: {str(e)}\n")
+from scheduler import JOBS_FILE, Scheduler, load_jobs
+from metrics import append_jsonl, write_prometheus
+from event_log import configure_logging
+
+_print_lock = threading.Lock()
+
+def print_event(job, event, verbose=False):
+    """Print one event; jobs run in parallel, so lines are prefixed with the job name."""
+    status = event.get("status", "")
+    if status in ("moved", "skipped") and not verbose:
+        return
+    name = job["name"]
+    if status == "started":
+        line = f"🟢 [{name}] Starting organization at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    elif status == "finished":
+        line = f"✅ [{name}] Done! Moved: {event['moved']} | Skipped: {event['skipped']} | Errors: {event['errors']}"
+    elif status == "busy":
+        line = f"⏳ [{name}] Skipped this slot: {event['message']}"
+    elif status == "failed":
+        line = f"❌ [{name}] Error: {event['message']}"
+    elif status == "interrupted":
+        line = f"⚠️  [{name}] Not resumed: {event['message']}"
+    elif status == "batch":
+        line = f"📥 [{name}] {event['files']} new file(s) at {datetime.now().strftime('%H:%M:%S')}"
+    elif status == "watching":
+        line = f"🟢 [{name}] Watcher running ({event['mode']})"
+    elif status == "moved":
+        line = f"✅ [{name}] Moved: {event.get('file', '')} → {event.get('category', '')}"
+    elif status == "skipped":
+        line = f"⚠️  [{name}] Skipped: {event.get('file', '')} - {event.get('reason', '')}"
+    elif status == "error":
+        line = f"❌ [{name}] Error: {event.get('file', '')} - {event.get('message', '')}"
+    else:
+        return
+    with _print_lock:
+        print(line)
+
+def metrics_exporter(path):
+    """on_event hook exporting the metrics of every finished organize run."""
+    latest = {}
+    lock = threading.Lock()
+
+    def export(job, event):
+        if event.get("status") != "done" or "metrics" not in event:
+            return
+        with lock:
+            if path.endswith(".prom"):
+                latest[job["name"]] = event["metrics"]
+                write_prometheus(path, [({"job": name}, m) for name, m in latest.items()])
+            else:
+                append_jsonl(path, {"job": job["name"], "folder": job["folder"], "run_id": event["run_id"],
+                                    "at": datetime.now().isoformat(), "moved": event["moved"],
+                                    "skipped": event["skipped"], "metrics": event["metrics"]})
+    return export
+
+def watch(jobs, on_event=print_event):
+    """Daemon mode: organize new files as soon as they arrive, one watcher per folder."""
+    from watcher import watch_folder
+
+    def run(job):
+        try:
+            for event in watch_folder(job["folder"]):
+                on_event(job, event)
+        except Exception as e:
+            print_event(job, {"status": "failed", "message": str(e)})
+
+    threads = [threading.Thread(target=run, args=(job,), daemon=True) for job in jobs]
+    for t in threads:
+        t.start()
+    print("Keep this window open. Press Ctrl+C to stop.\n")
+    for t in threads:
+        t.join()
 
 def main():
     """Main function - just run this!"""
-    
+    parser = argparse.ArgumentParser(description="Run the SmartFileOrganizer schedule.")
+    parser.add_argument("--watch", action="store_true", help="organize new files as they arrive")
+    parser.add_argument("--metrics", metavar="FILE", help="export run metrics (.prom or JSON lines)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every moved/skipped file")
+    parser.add_argument("--log-level", type=int, choices=(0, 1, 2), default=1,
+                        help="log file detail: 0 warnings, 1 progress summaries, 2 every file")
+    args = parser.parse_args()
+    configure_logging(args.log_level, console=False)
+
+    export = metrics_exporter(args.metrics) if args.metrics else None
+
+    def on_event(job, event):
+        print_event(job, event, args.verbose)
+        if export:
+            export(job, event)
+
     print("""
 ╔════════════════════════════════════════════════════════╗
 ║       SmartFileOrganizer - Simple Scheduler           ║
@@ -52,9 +112,9 @@ def main():
 ║   Press Ctrl+C to stop                                ║
 ╚════════════════════════════════════════════════════════╝
     """)
-    
+
     # Try to load schedule
-    if not os.path.exists("scheduled_jobs.json"):
+    if not os.path.exists(JOBS_FILE):
         print("❌ ERROR: No schedule found!")
         print("\n📝 How to fix:")
         print("1. Open the Streamlit app")
@@ -64,45 +124,44 @@ def main():
         print("5. Then run this script again!\n")
         input("Press Enter to exit...")
         return
-    
+
     # Load schedule
     try:
-        with open("scheduled_jobs.json", "r") as f:
-            data = json.load(f)
-        
-        folder = data.get("folder", "")
-        times = data.get("times", [])
-        
-        if not folder or not times:
+        jobs = []
+        for job in load_jobs():
+            folder = job.get("folder", "")
+            if not folder:
+                print(f"⚠️  Job {job['name']!r} has no folder, ignored.")
+            elif not os.path.isdir(folder):
+                print(f"⚠️  Folder not found for job {job['name']!r}: {folder}")
+            else:
+                jobs.append(job)
+
+        if not jobs:
             print("❌ ERROR: Schedule is empty!")
             print("Please configure it in the app first.\n")
             input("Press Enter to exit...")
             return
-        
-        # Check if folder exists
-        if not os.path.exists(folder):
-            print(f"❌ ERROR: Folder not found: {folder}")
-            print("Please check the path and try again.\n")
-            input("Press Enter to exit...")
+
+        if args.watch:
+            for job in jobs:
+                print(f"📂 Watching folder: {job['folder']}")
+            watch(jobs, on_event)
             return
-        
-        # Schedule the jobs
-        print(f"📂 Folder to organize: {folder}")
-        print(f"⏰ Scheduled times:")
-        for t in times:
-            schedule.every().day.at(t).do(organize_now, folder=folder)
-            print(f"   • {t}")
-        
+
+        scheduler = Scheduler(jobs, on_event=on_event)
+        print("⏰ Scheduled jobs:")
+        for job, next_run in scheduler.next_runs():
+            print(f"   • {job['name']}: {job['folder']} (next run {next_run.strftime('%Y-%m-%d %H:%M')})")
+
         print(f"\n{'='*60}")
         print("🟢 SCHEDULER IS RUNNING!")
         print("Keep this window open. Press Ctrl+C to stop.")
         print(f"{'='*60}\n")
-        
-        # Run forever
-        while True:
-            schedule.run_pending()
-            time.sleep(30)  # Check every 30 seconds
-    
+
+        # Run until Ctrl+C; runs in progress are allowed to finish
+        scheduler.run()
+
     except KeyboardInterrupt:
         print("\n\n🛑 Scheduler stopped. Goodbye!\n")
     except Exception as e:
@@ -110,4 +169,4 @@ def main():
         input("Press Enter to exit...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,119 @@
+# scan_cache.py
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = "scan_cache.db"
+MAX_ENTRIES = 2_000_000      # size cap, least recently used rows go first
+MAX_AGE_DAYS = 90            # rows not seen for this long are dropped
+
+
+class ScanCache:
+    """
+    On-disk (SQLite) cache of file content hashes, written as they are
+    computed (scans do not add a row per file, only hashing does).
+    Rows are keyed by (st_dev, st_ino, st_size, st_mtime_ns), so a file that
+    is renamed keeps its hashes and a file that changes gets a new key.
+    """
+
+    def __init__(self, db_path=CACHE_FILE, max_entries=MAX_ENTRIES, max_age_days=MAX_AGE_DAYS):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._touched = []
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                path TEXT,
+                partial_hash TEXT,
+                full_hash TEXT,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (dev, ino, size, mtime_ns)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_last_used ON files(last_used)")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def key(st):
+        """Cache key for an os.stat_result (st_ino must be real, not 0)."""
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def get_hash(self, key, kind):
+        """Return a cached digest for key, kind is "full" or "partial:<bytes>"."""
+        column, prefix = self._column(kind)
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {column} FROM files WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+                key
+            ).fetchone()
+            if not row or not row[0] or not row[0].startswith(prefix):
+                return None
+            self._touched.append((int(time.time()),) + tuple(key))
+            return row[0][len(prefix):]
+
+    def put_hash(self, key, path, kind, digest):
+        column, prefix = self._column(kind)
+        with self._lock:
+            self.conn.execute(
+                f"""INSERT INTO files (dev, ino, size, mtime_ns, path, {column}, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (dev, ino, size, mtime_ns) DO UPDATE SET
+                        {column}=excluded.{column}, path=excluded.path,
+                        last_used=excluded.last_used""",
+                tuple(key) + (path, prefix + digest, int(time.time()))
+            )
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE files SET last_used=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+                self._touched
+            )
+            self._touched = []
+        self.conn.commit()
+
+    def prune(self):
+        """Drop rows older than max_age_days, then the LRU rows above max_entries."""
+        with self._lock:
+            self._flush_locked()
+            cutoff = int(time.time()) - self.max_age_days * 86400
+            self.conn.execute("DELETE FROM files WHERE last_used < ?", (cutoff,))
+            count = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    """DELETE FROM files WHERE rowid IN (
+                           SELECT rowid FROM files ORDER BY last_used LIMIT ?)""",
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+
+    def close(self):
+        self.prune()
+        self.conn.close()
+
+    @staticmethod
+    def _column(kind):
+        if kind == "full":
+            return "full_hash", ""
+        if kind.startswith("partial:"):
+            # partial digests depend on how many bytes were sampled
+            return "partial_hash", kind[len("partial:"):] + ":"
+        raise ValueError(f"Unknown hash kind: {kind}")
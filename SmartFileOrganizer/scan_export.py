@@ -0,0 +1,139 @@
+# scan_export.py
+import os
+import csv
+import gzip
+import json
+import re
+import time
+import uuid
+from datetime import datetime
+
+EXPORT_FOLDER = "static"       # served from disk by Streamlit's static file serving
+EXPORT_MAX_AGE = 24 * 3600     # seconds an export stays in the public folder
+_EXPORT_NAME = re.compile(r"-[0-9a-f]{32}\.")   # the random part added by unique_export_path
+CSV_COLUMNS = ["type", "path", "name", "size", "modified", "category", "message"]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def open_export(path):
+    """Open path for writing text, gzip-compressed when it ends in .gz."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    if path.endswith(".gz"):
+        # level 1: several times smaller than plain text at little CPU cost
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=1)
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def unique_export_path(folder, name):
+    """
+    folder/<stem>-<uuid hex><extensions> for name, so exports of different
+    sessions never overwrite each other and cannot be guessed from the
+    public folder's URL.
+    """
+    stem, dot, ext = name.partition(".")
+    return os.path.join(folder, f"{stem}-{uuid.uuid4().hex}{dot}{ext}")
+
+
+def cleanup_exports(folder, max_age=EXPORT_MAX_AGE, keep=()):
+    """
+    Delete exports made by unique_export_path older than max_age seconds
+    (other files in folder are left alone), except the paths in keep.
+    Returns the number of files removed.
+    """
+    keep = {os.path.abspath(path) for path in keep}
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not _EXPORT_NAME.search(entry.name) or os.path.abspath(entry.path) in keep:
+            continue
+        try:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass   # removed by another session meanwhile
+    return removed
+
+
+def export_format(path):
+    """"csv" or "jsonl" from the file name (a trailing .gz is ignored)."""
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.endswith(".csv") else "jsonl"
+
+
+class ScanExporter:
+    """
+    Streams one record per file (plus errors and empty folders) to disk while
+    FolderScanner.scan runs, so nothing per-file is held in memory for the
+    export. JSON lines or CSV by extension, gzip-compressed for a .gz name.
+    JSON lines exports end with the duplicate candidates, one line per size
+    group, and a "summary" line with the scan totals.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = export_format(path)
+        self.rows = 0
+        self._file = open_export(path)
+        self._writer = None
+        if self.format == "csv":
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(CSV_COLUMNS)
+
+    def add(self, kind, path, name, st, category=None):
+        """Record one walker tuple; kinds other than file/error/empty are ignored."""
+        if kind == "file":
+            row = {"type": "file", "path": path, "name": name, "size": st.st_size,
+                   "modified": datetime.fromtimestamp(st.st_mtime).isoformat(), "category": category}
+        elif kind == "error":
+            row = {"type": "error", "path": path, "message": name}
+        elif kind == "empty":
+            row = {"type": "empty", "path": path}
+        else:
+            return
+        self.rows += 1
+        if self._writer is not None:
+            self._writer.writerow([row.get(column, "") for column in CSV_COLUMNS])
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def finish(self, results):
+        """Append the scan-wide results (JSON lines only) and close the file."""
+        try:
+            if self._writer is None:
+                write = self._file.write
+                for group in results.get("duplicate_candidates", []):
+                    write(json.dumps(dict(group, type="duplicate_candidates"), ensure_ascii=False) + "\n")
+                summary = {key: value for key, value in results.items() if key != "duplicate_candidates"}
+                summary["type"] = "summary"
+                write(json.dumps(summary, ensure_ascii=False, default=_json_default) + "\n")
+        finally:
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def export_summary(results, path):
+    """
+    Write scan_results as one JSON document, encoded in chunks straight to
+    the file (gzip for .gz); datetimes become ISO strings without copying
+    or modifying the results.
+    """
+    with open_export(path) as f:
+        # json.dump encodes incrementally, writing chunk by chunk
+        json.dump(results, f, indent=2, default=_json_default, ensure_ascii=False)
+    return path
@@ -1,15 +1,303 @@
 # scanner.py
 import os
 import time
-import json
+import heapq
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from collections import defaultdict
 from datetime import datetime
+from duplicates import PARTIAL_BYTES, find_duplicate_groups
+from snapshot import iter_incremental, load_snapshot, save_snapshot
+from walker import list_entries, parallel_walk
+from file_table import FileTable
+from classifier import get_classifier
+from metrics import Metrics
+from progress import PROGRESS_INTERVAL, ProgressThrottle
+from scan_export import export_summary
+
+# process-pool scans: subtrees handed out per process (more = better balance)
+PARTITIONS_PER_PROCESS = 4
+# ...found by expanding the top of the tree at most this many levels deep
+PARTITION_MAX_DEPTH = 3
+
+
+def iter_scandir(root):
+    """
+    Walk a folder tree with os.scandir, one directory listing at a time.
+    Yields (kind, path, name, stat) tuples where kind is "file", "dir",
+    "empty", "error" or "dir_done". Memory holds the stack of pending
+    directories plus the current directory's full listing (walker.list_entries
+    builds it with stats before yielding), so one huge folder costs memory
+    in proportion to its size. File stats come from the DirEntry cache.
+    """
+    root = os.fspath(root)
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        entries, subdirs = list_entries(current, is_root=current == root)
+        stack.extend(subdirs)
+        yield from entries
+
+
+def iter_rglob(root):
+    """Fallback walk using Path.rglob, yielding the same tuples as iter_scandir."""
+    for item in Path(root).rglob('*'):
+        try:
+            if item.is_file():
+                yield ("file", str(item), item.name, item.stat())
+            elif item.is_dir():
+                yield ("dir", str(item), item.name, None)
+                if not any(item.iterdir()):
+                    yield ("empty", str(item), None, None)
+                yield ("dir_done", str(item), None, None)
+        except Exception as e:
+            yield ("error", str(item), str(e), None)
+
+
+# how many oldest/newest files are reported when no top_k is given
+TIMELINE_LIMIT = 10
+
+
+def _push_bounded(heap, k, item):
+    """Keep the k largest items in a min-heap; O(log k) per push."""
+    if k <= 0:
+        return
+    if len(heap) < k:
+        heapq.heappush(heap, item)
+    elif item[0] > heap[0][0]:
+        heapq.heapreplace(heap, item)
+
+
+class ScanAccumulator:
+    """
+    Running scan aggregates, fed one walker tuple at a time.
+    With top_k set, largest/oldest/newest files are kept in bounded heaps so
+    memory stays O(top_k); otherwise every file is kept for largest_files.
+    """
+
+    def __init__(self, top_k=None):
+        self.top_k = top_k
+        self.classifier = get_classifier()
+        self.total_files = 0
+        self.total_folders = 0
+        self.total_size = 0
+        self.dirs_scanned = 0
+        self.file_types = {}
+        self.categories = {}
+        self.largest_files = []
+        self.oldest_heap = []
+        self.newest_heap = []
+        self.empty_folders = []
+        self.hidden_files = 0
+        self.errors = []
+        self.duplicate_candidates = {}
+
+    def __getstate__(self):
+        # sent between processes without the classifier; each process has its own
+        state = self.__dict__.copy()
+        del state["classifier"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.classifier = get_classifier()
+
+    def add(self, kind, path, name, st):
+        """Count one walker tuple; returns the category for files."""
+        if kind == "file":
+            return self.add_file(path, name, st)
+        elif kind == "dir":
+            self.total_folders += 1
+        elif kind == "dir_done":
+            self.dirs_scanned += 1
+        elif kind == "empty":
+            self.empty_folders.append(path)
+        elif kind == "error":
+            self.errors.append(f"{path}: {name}")
+
+    def add_file(self, path, name, st):
+        size = st.st_size
+        self.total_files += 1
+        self.total_size += size
+
+        ext = os.path.splitext(name)[1].lower() or "no_ext"
+        self.file_types[ext] = self.file_types.get(ext, 0) + 1
+
+        # categorize files with the shared classifier (same as the organizer)
+        cat_name = self.classifier.classify(name, size, st.st_mtime)
+        cat = self.categories.get(cat_name)
+        if cat is None:
+            cat = self.categories[cat_name] = {"count": 0, "size": 0}
+        cat["count"] += 1
+        cat["size"] += size
+
+        # compact tuples; result dicts are only built in results()
+        if self.top_k is None:
+            self.largest_files.append((size, name, path, cat_name))
+        else:
+            _push_bounded(self.largest_files, self.top_k, (size, name, path, cat_name))
+        limit = self.top_k or TIMELINE_LIMIT
+        mtime = st.st_mtime
+        _push_bounded(self.oldest_heap, limit, (-mtime, name))
+        _push_bounded(self.newest_heap, limit, (mtime, name))
+
+        # track duplicates by size
+        self.duplicate_candidates.setdefault(size, []).append(path)
+
+        # hidden file
+        if name.startswith('.') or name.startswith('~'):
+            self.hidden_files += 1
+        return cat_name
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from a parallel worker) into this one."""
+        self.total_files += other.total_files
+        self.total_folders += other.total_folders
+        self.total_size += other.total_size
+        self.dirs_scanned += other.dirs_scanned
+        self.hidden_files += other.hidden_files
+        for ext, count in other.file_types.items():
+            self.file_types[ext] = self.file_types.get(ext, 0) + count
+        for cat_name, stats in other.categories.items():
+            cat = self.categories.setdefault(cat_name, {"count": 0, "size": 0})
+            cat["count"] += stats["count"]
+            cat["size"] += stats["size"]
+        if self.top_k is None:
+            self.largest_files.extend(other.largest_files)
+        else:
+            for item in other.largest_files:
+                _push_bounded(self.largest_files, self.top_k, item)
+        limit = self.top_k or TIMELINE_LIMIT
+        for item in other.oldest_heap:
+            _push_bounded(self.oldest_heap, limit, item)
+        for item in other.newest_heap:
+            _push_bounded(self.newest_heap, limit, item)
+        self.empty_folders.extend(other.empty_folders)
+        self.errors.extend(other.errors)
+        for size, paths in other.duplicate_candidates.items():
+            self.duplicate_candidates.setdefault(size, []).extend(paths)
+        return self
+
+    def results(self, format_size):
+        """Build the scan_results dict (without scan_time)."""
+        largest = sorted(self.largest_files, key=lambda x: x[0], reverse=True)
+        oldest = sorted(((-neg, name) for neg, name in self.oldest_heap), key=lambda x: x[0])
+        newest = sorted(self.newest_heap, key=lambda x: x[0], reverse=True)
+
+        def timeline(items):
+            return [
+                {"name": name, "modified": datetime.fromtimestamp(mtime), "timestamp": mtime}
+                for mtime, name in items
+            ]
+
+        return {
+            "total_files": self.total_files,
+            "total_folders": self.total_folders,
+            "total_size": self.total_size,
+            "file_types": dict(self.file_types),
+            "categories": dict(self.categories),
+            "largest_files": [
+                {
+                    "name": name,
+                    "size": size,
+                    "size_formatted": format_size(size),
+                    "path": path,
+                    "category": cat_name
+                }
+                for size, name, path, cat_name in largest
+            ],
+            "oldest_files": timeline(oldest),
+            "newest_files": timeline(newest),
+            "empty_folders": self.empty_folders,
+            "hidden_files": self.hidden_files,
+            "errors": self.errors,
+            "duplicate_candidates": [
+                {
+                    "size": k,
+                    "size_formatted": format_size(k),
+                    "count": len(v),
+                    "files": v
+                }
+                for k, v in self.duplicate_candidates.items() if len(v) > 1
+            ]
+        }
+
+
+def partition_tree(root, parts, acc, max_depth=PARTITION_MAX_DEPTH):
+    """
+    List the top of the tree breadth-first, adding those entries to acc,
+    until there are at least `parts` unlisted folders (or max_depth levels
+    were expanded). Returns those folders, each the root of a subtree that
+    is still to be walked.
+    """
+    root = os.fspath(root)
+    entries, frontier = list_entries(root, is_root=True)
+    for entry in entries:
+        acc.add(*entry)
+    depth = 0
+    while frontier and len(frontier) < parts and depth < max_depth:
+        level = []
+        for folder in frontier:
+            entries, subdirs = list_entries(folder)
+            for entry in entries:
+                acc.add(*entry)
+            level.extend(subdirs)
+        frontier = level
+        depth += 1
+    return frontier
+
+
+def scan_subtrees(roots, top_k):
+    """
+    Process-pool worker: walk and classify whole subtrees, returning their
+    ScanAccumulator (the roots themselves are counted by the caller).
+    """
+    acc = ScanAccumulator(top_k)
+    stack = list(roots)
+    while stack:
+        entries, subdirs = list_entries(stack.pop())
+        stack.extend(subdirs)
+        for entry in entries:
+            acc.add(*entry)
+    return acc
+
+
+def scan_processes(root, processes, top_k=None, metrics=None, on_merge=None):
+    """
+    Scan root on `processes` worker processes: the top of the tree is split
+    into about PARTITIONS_PER_PROCESS subtree groups per process, each worker
+    returns a partial ScanAccumulator and the parent merges them as they
+    finish (counts, sizes, top-K heaps and same-size duplicate candidates
+    all merge exactly). on_merge(acc, path) is called after every merge.
+    Returns the merged accumulator.
+    """
+    metrics = metrics or Metrics()
+    acc = ScanAccumulator(top_k)
+    parts = processes * PARTITIONS_PER_PROCESS
+    with metrics.phase("partition"):
+        frontier = partition_tree(root, parts, acc)
+    # round-robin so neighbouring (often similar) folders land in different groups
+    groups = [frontier[i::parts] for i in range(min(parts, len(frontier)))]
+    metrics.count("partitions", len(groups))
+    metrics.count("processes", processes)
+    with metrics.phase("pool"):
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {pool.submit(scan_subtrees, group, top_k): group for group in groups}
+            for future in as_completed(futures):
+                with metrics.phase("merge"):
+                    acc.merge(future.result())
+                if on_merge:
+                    on_merge(acc, futures[future][0])
+    return acc
 
 
 class FolderScanner:
-    def __init__(self, folder_path):
+    def __init__(self, folder_path, top_k=None, cache=None):
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"top_k must be at least 1 (or None for no limit), not {top_k}")
         self.folder_path = Path(folder_path)
+        self.top_k = top_k
+        self.cache = cache  # optional ScanCache shared across scans
+        self.file_table = None
         self.scan_results = None
 
     def format_size(self, size_bytes):
@@ -20,142 +308,176 @@ class FolderScanner:
             size_bytes /= 1024
         return f"{size_bytes:.2f} PB"
 
-    def scan(self, progress_callback=None):
-        """Deep scan folder and collect stats."""
+    def scan(self, progress_callback=None, engine="scandir", incremental=False, workers=None,
+             collect_table=False, progress_interval=PROGRESS_INTERVAL, processes=None, exporter=None):
+        """
+        Deep scan folder and collect stats.
+        engine="scandir" streams the tree with os.scandir and reuses the cached
+        DirEntry data; engine="rglob" is the older pathlib walk, kept as a fallback.
+        incremental=True replays folders whose mtime is unchanged from the
+        previous scan's snapshot and adds an added/removed/modified "delta".
+        workers > 1 lists folders on a work-stealing thread pool, which helps on
+        latency-bound network shares.
+        processes > 1 walks and classifies subtrees in a process pool instead
+        and merges the partial aggregates (see scan_processes), for when the
+        per-file work is CPU bound. It cannot be combined with incremental,
+        collect_table or exporter.
+        collect_table=True also fills self.file_table, a columnar FileTable
+        that analytics can wrap as a DataFrame.
+        exporter (a scan_export.ScanExporter) gets every file as it is found
+        and the results at the end, then is closed.
+        Progress is reported at most once per progress_interval seconds (and
+        once at the end) with running file/byte totals, the rate in folders/s
+        and, for incremental scans, an ETA based on the previous snapshot.
+        Per-phase timings and counts are returned under "metrics".
+        """
         start_time = time.time()
-        total_files = 0
-        total_folders = 0
-        total_size = 0
-        file_types = defaultdict(int)
-        categories = defaultdict(lambda: {"count": 0, "size": 0})
-        largest_files = []
-        oldest_files = []
-        newest_files = []
-        empty_folders = []
-        hidden_files = 0
-        errors = []
-        duplicate_candidates = defaultdict(list)
-
-        all_items = list(self.folder_path.rglob('*'))
-        total_items = len(all_items)
-
-        for idx, item in enumerate(all_items, 1):
-            try:
-                if item.is_file():
-                    total_files += 1
-                    size = item.stat().st_size
-                    total_size += size
-                    ext = item.suffix.lower() if item.suffix else "no_ext"
-                    file_types[ext] += 1
-
-                    # categorize files by extension type
-                    cat_name = ext.strip('.') if ext != "no_ext" else "other"
-                    categories[cat_name]["count"] += 1
-                    categories[cat_name]["size"] += size
-
-                    # track largest files
-                    largest_files.append({
-                        "name": item.name,
-                        "size": size,
-                        "size_formatted": self.format_size(size),
-                        "path": str(item),
-                        "category": cat_name
-                    })
-
-                    # track duplicates by size
-                    duplicate_candidates[size].append(str(item))
-
-                    # track oldest/newest - FIXED: Convert to datetime object
-                    mtime = item.stat().st_mtime
-                    modified_datetime = datetime.fromtimestamp(mtime)
-                    
-                    oldest_files.append({
-                        "name": item.name, 
-                        "modified": modified_datetime,
-                        "timestamp": mtime  # Keep timestamp for sorting
-                    })
-                    newest_files.append({
-                        "name": item.name, 
-                        "modified": modified_datetime,
-                        "timestamp": mtime  # Keep timestamp for sorting
-                    })
-
-                    # hidden file
-                    if item.name.startswith('.') or item.name.startswith('~'):
-                        hidden_files += 1
-
-                elif item.is_dir():
-                    total_folders += 1
-                    if not any(item.iterdir()):
-                        empty_folders.append(str(item))
-                
-                # progress callback
-                if progress_callback:
-                    progress_callback({
-                        "status": "scanning", 
-                        "current": idx, 
-                        "total": total_items, 
-                        "item": str(item.name)
-                    })
-
-            except Exception as e:
-                errors.append(f"{str(item)}: {str(e)}")
-
-        # post-process - Sort by timestamp
-        largest_files.sort(key=lambda x: x["size"], reverse=True)
-        oldest_files.sort(key=lambda x: x["timestamp"])
-        newest_files.sort(key=lambda x: x["timestamp"], reverse=True)
-        
-        duplicate_candidates = [
-            {
-                "size": k, 
-                "size_formatted": self.format_size(k), 
-                "count": len(v), 
-                "files": v
-            }
-            for k, v in duplicate_candidates.items() if len(v) > 1
-        ]
+        metrics = Metrics()
+        delta = None
+        expected_dirs = None
+        throttle = ProgressThrottle(progress_interval)
+
+        def report(acc, path):
+            progress_callback(dict({
+                "status": "scanning",
+                "current": acc.total_files + acc.total_folders,
+                "total": None,
+                "dirs": acc.dirs_scanned,
+                "files": acc.total_files,
+                "bytes": acc.total_size,
+                "item": os.path.basename(path) or path
+            }, **throttle.stats(acc.dirs_scanned, expected_dirs)))
+
+        if processes and processes > 1:
+            if incremental or collect_table or exporter is not None:
+                raise ValueError("process-pool scans support neither incremental, collect_table nor exporter")
+            self.file_table = None
+
+            def on_merge(acc, path):
+                if progress_callback and throttle.ready(acc.dirs_scanned):
+                    report(acc, path)
 
+            acc = scan_processes(self.folder_path, processes, self.top_k, metrics, on_merge)
+        else:
+            if incremental:
+                with metrics.phase("snapshot_load"):
+                    previous = load_snapshot(self.folder_path)
+                current = {}
+                expected_dirs = len(previous) or None
+                entries = iter_incremental(self.folder_path, previous, current)
+                delta = {"added": [], "removed": [], "modified": [],
+                         "dirs_reused": 0, "baseline": not previous}
+            elif engine == "rglob":
+                entries = iter_rglob(self.folder_path)
+            elif workers and workers > 1:
+                entries = parallel_walk(self.folder_path, workers)
+            else:
+                entries = iter_scandir(self.folder_path)
+
+            acc = ScanAccumulator(self.top_k)
+            table = self.file_table = FileTable() if collect_table else None
+            loop_start = time.perf_counter()
+            for kind, path, name, st in metrics.timed_iter("list", entries):
+                category = acc.add(kind, path, name, st)
+                if exporter is not None:
+                    exporter.add(kind, path, name, st, category)
+                if table is not None and kind == "file":
+                    table.add_file(os.path.dirname(path), name, st)
+                if delta is not None:
+                    if kind in ("added", "removed", "modified"):
+                        delta[kind].append(path)
+                    elif kind == "reused":
+                        delta["dirs_reused"] += 1
+
+                # progress callback, throttled
+                if progress_callback and kind == "dir_done" and throttle.ready(acc.dirs_scanned):
+                    report(acc, path)
+
+            # listing is charged to "list"; the rest of the loop is aggregation
+            metrics.add_time("aggregate", time.perf_counter() - loop_start - metrics.phases.get("list", 0.0))
+
+        if progress_callback:
+            report(acc, str(self.folder_path))
+
+        if incremental:
+            with metrics.phase("snapshot_save"):
+                save_snapshot(self.folder_path, current)
+
+        with metrics.phase("results"):
+            self.scan_results = acc.results(self.format_size)
         end_time = time.time()
-        self.scan_results = {
-            "total_files": total_files,
-            "total_folders": total_folders,
-            "total_size": total_size,
-            "file_types": dict(file_types),
-            "categories": dict(categories),
-            "largest_files": largest_files,
-            "oldest_files": oldest_files[:10],
-            "newest_files": newest_files[:10],
-            "empty_folders": empty_folders,
-            "hidden_files": hidden_files,
-            "errors": errors,
-            "duplicate_candidates": duplicate_candidates,
-            "scan_time": end_time - start_time
-        }
+        if delta is not None:
+            self.scan_results["delta"] = delta
+            metrics.count("dirs_reused", delta["dirs_reused"])
+        metrics.count("dirs", acc.dirs_scanned)
+        metrics.count("files", acc.total_files)
+        metrics.count("bytes", acc.total_size)
+        metrics.count("errors", len(acc.errors))
+        self.scan_results["scan_time"] = end_time - start_time
+        if exporter is not None:
+            self.scan_results["export"] = {"path": exporter.path, "rows": exporter.rows}
+            with metrics.phase("export"):
+                exporter.finish(self.scan_results)
+        self.scan_results["metrics"] = metrics.as_dict()
         return self.scan_results
 
+    def find_duplicates(self, min_size=1, partial_bytes=PARTIAL_BYTES, max_workers=4,
+                        byte_budget=None, progress_callback=None):
+        """
+        Confirm duplicates by content: size groups -> head/tail hash -> full hash.
+        Reuses the size groups of the last scan when there is one.
+        max_workers bounds concurrent reads, byte_budget caps total bytes read.
+        """
+        if self.scan_results:
+            size_groups = {
+                group["size"]: group["files"]
+                for group in self.scan_results["duplicate_candidates"]
+            }
+        else:
+            size_groups = {}
+            for kind, path, name, st in iter_scandir(self.folder_path):
+                if kind == "file":
+                    size_groups.setdefault(st.st_size, []).append(path)
+
+        found = find_duplicate_groups(
+            size_groups,
+            partial_bytes=partial_bytes,
+            max_workers=max_workers,
+            byte_budget=byte_budget,
+            min_size=min_size,
+            cache=self.cache,
+            progress_callback=progress_callback
+        )
+        found["groups"] = [
+            {
+                "hash": digest,
+                "size": size,
+                "size_formatted": self.format_size(size),
+                "count": len(paths),
+                "wasted": size * (len(paths) - 1),
+                "files": paths
+            }
+            for size, digest, paths in found["groups"]
+        ]
+        if self.scan_results is not None:
+            self.scan_results["duplicates"] = found["groups"]
+        return found
+
     def export_results(self, filename="scan_results.json"):
-        """Export scan results to a JSON file."""
+        """
+        Export scan results to a JSON file (gzip-compressed for a .gz name).
+        For a per-file listing pass a ScanExporter to scan() instead.
+        """
         if not self.scan_results:
             return False, "No scan results to export!"
         try:
-            # Convert datetime objects to strings for JSON serialization
-            export_data = self.scan_results.copy()
-            
-            # Convert datetime in oldest/newest files
-            for file_list in ['oldest_files', 'newest_files']:
-                for file_info in export_data[file_list]:
-                    if isinstance(file_info.get('modified'), datetime):
-                        file_info['modified'] = file_info['modified'].isoformat()
-            
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(export_data, f, indent=2, default=str)
-            return True, filename
+            return True, export_summary(self.scan_results, filename)
         except Exception as e:
             return False, str(e)
 
 
-def deep_scan(folder_path, progress_callback=None):
+def deep_scan(folder_path, progress_callback=None, top_k=None, incremental=False, workers=None,
+              processes=None):
     """Helper function for quick usage without creating FolderScanner instance."""
-    scanner = FolderScanner(folder_path)
-    return scanner.scan(progress_callback)
\ No newline at end of file
+    scanner = FolderScanner(folder_path, top_k=top_k)
+    return scanner.scan(progress_callback, incremental=incremental, workers=workers, processes=processes)
\ No newline at end of file
@@ -0,0 +1,226 @@
+# scheduler.py
+import os
+import re
+import json
+import heapq
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from classifier import Classifier
+from config import CUSTOM_RULES
+from file_organizer import organize_directory
+from move_journal import interrupted_runs
+
+JOBS_FILE = "scheduled_jobs.json"
+SCHEDULER_WORKERS = 4    # organize runs executing at the same time
+
+# scheduled_jobs.json:
+#   {"jobs": [{"name": "downloads", "folder": "D:\\Downloads",
+#              "times": ["09:00", "18:30"],   # daily at these times, and/or
+#              "every": "15m",                # an interval (s, m, h, d), and/or
+#              "cron": "*/30 8-18 * * 1-5",   # minute hour day month weekday
+#              "recursive": false, "exclude": [".git"],
+#              "rules": [...]}]}              # extra CUSTOM_RULES for this job
+# The old single-job format {"folder": ..., "times": [...]} is still read.
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def load_jobs(path=JOBS_FILE):
+    """Jobs from the schedule file, with a "name" each (the folder by default)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    jobs = data.get("jobs") if "jobs" in data else [data]
+    for job in jobs:
+        job.setdefault("name", job.get("folder", ""))
+    return jobs
+
+
+def save_jobs(jobs, path=JOBS_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"jobs": jobs}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def parse_interval(value):
+    """"90", "15m", "2h" or a number of seconds -> timedelta."""
+    if isinstance(value, (int, float)):
+        return timedelta(seconds=value)
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", str(value).lower())
+    if not m:
+        raise ValueError(f"Invalid interval: {value!r}")
+    return timedelta(seconds=float(m.group(1)) * _UNITS[m.group(2) or "s"])
+
+
+def _cron_field(field, low, high):
+    """One cron field ("*", "*/5", "1-5", "0,30", "10-50/10") -> set of values."""
+    values = set()
+    for part in field.split(","):
+        body, _, step = part.partition("/")
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            start, end = (int(x) for x in body.split("-", 1))
+        else:
+            start = end = int(body)
+            if step:
+                end = high
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field out of range: {field!r}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week (0=Sunday)."""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.minutes = _cron_field(fields[0], 0, 59)
+        self.hours = _cron_field(fields[1], 0, 23)
+        self.days = _cron_field(fields[2], 1, 31)
+        self.months = _cron_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _cron_field(fields[4], 0, 7)}
+        # as in cron: when both day fields are restricted, either may match
+        self.any_day = fields[2] == "*" or fields[4] == "*"
+        if self.next_after(datetime.now()) is None:
+            # e.g. "0 0 30 2 *"; would otherwise stop the scheduler later on
+            raise ValueError(f"Cron expression never fires: {expression!r}")
+
+    def _day_matches(self, t):
+        in_month = t.day in self.days
+        in_week = (t.weekday() + 1) % 7 in self.weekdays
+        return in_month and in_week if self.any_day else in_month or in_week
+
+    def next_after(self, after):
+        t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months or not self._day_matches(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.hours:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        return None
+
+
+class JobSchedule:
+    """When a job runs next: the earliest of its daily times, interval and cron."""
+
+    def __init__(self, job):
+        self.times = [datetime.strptime(t, "%H:%M").time() for t in job.get("times", [])]
+        self.every = parse_interval(job["every"]) if job.get("every") else None
+        self.cron = CronSchedule(job["cron"]) if job.get("cron") else None
+        if not (self.times or self.every or self.cron):
+            raise ValueError(f"Job {job.get('name')!r} has no times, every or cron")
+
+    def next_after(self, after):
+        candidates = []
+        for t in self.times:
+            at = datetime.combine(after.date(), t)
+            candidates.append(at if at > after else at + timedelta(days=1))
+        if self.every:
+            candidates.append(after + self.every)
+        if self.cron:
+            candidates.append(self.cron.next_after(after))
+        return min(c for c in candidates if c is not None)
+
+
+def run_job(job, on_event=None):
+    """
+    One organize run for a job with the job's own rules. Interrupted runs on
+    its folder are only reported ("interrupted" events): resuming or rolling
+    them back is left to the user (GUI), as the move state may need a look.
+    Returns the final counts.
+    """
+    folder = os.path.abspath(job["folder"])
+    on_event = on_event or (lambda job, event: None)
+    for run in interrupted_runs():
+        if run["folder"] == folder:
+            on_event(job, {"status": "interrupted", "run_id": run["run_id"],
+                           "message": f"run {run['run_id']} from {run['timestamp'][:19]} was interrupted; "
+                                      f"resume or roll it back in the app"})
+
+    classifier = Classifier(rules=job["rules"] + CUSTOM_RULES) if job.get("rules") else None
+    counts = {"moved": 0, "skipped": 0, "errors": 0}
+    for event in organize_directory(folder, recursive=job.get("recursive", False),
+                                    exclude=job.get("exclude"), classifier=classifier):
+        status = event.get("status")
+        if status == "moved":
+            counts["moved"] += 1
+        elif status == "skipped":
+            counts["skipped"] += 1
+        elif status == "error":
+            counts["errors"] += 1
+        on_event(job, event)
+    return counts
+
+
+class Scheduler:
+    """
+    Runs many jobs on a bounded pool. A job whose folder is still being
+    organized when it comes due again is skipped for that slot, so runs on
+    one folder never overlap (two jobs on the same folder share the lock).
+    on_event(job, event) receives organize events from worker threads, plus
+    {"status": "started" | "finished" | "busy" | "failed"} for each slot.
+    """
+
+    def __init__(self, jobs, workers=SCHEDULER_WORKERS, on_event=None):
+        self.jobs = jobs
+        self.schedules = [JobSchedule(job) for job in jobs]
+        self.on_event = on_event or (lambda job, event: None)
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._locks = {}
+        self._stop = threading.Event()
+
+    def _lock_for(self, folder):
+        key = os.path.normcase(os.path.abspath(folder))
+        return self._locks.setdefault(key, threading.Lock())
+
+    def _run(self, job, lock):
+        try:
+            self.on_event(job, {"status": "started", "at": datetime.now().isoformat()})
+            counts = run_job(job, self.on_event)
+            self.on_event(job, dict(counts, status="finished"))
+        except Exception as e:
+            self.on_event(job, {"status": "failed", "message": str(e)})
+        finally:
+            lock.release()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """Dispatch jobs until stop() is called."""
+        now = datetime.now()
+        queue = [(s.next_after(now), i) for i, s in enumerate(self.schedules)]
+        heapq.heapify(queue)
+        try:
+            while queue and not self._stop.is_set():
+                due, i = queue[0]
+                wait = (due - datetime.now()).total_seconds()
+                if wait > 0:
+                    # re-check at least once a minute, in case the clock jumps
+                    self._stop.wait(min(wait, 60))
+                    continue
+                heapq.heapreplace(queue, (self.schedules[i].next_after(datetime.now()), i))
+                job = self.jobs[i]
+                lock = self._lock_for(job["folder"])
+                if lock.acquire(blocking=False):
+                    self._pool.submit(self._run, job, lock)
+                else:
+                    self.on_event(job, {"status": "busy", "message": "previous run still in progress"})
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def next_runs(self):
+        """[(job, next run time)] from now, for display."""
+        now = datetime.now()
+        return [(job, s.next_after(now)) for job, s in zip(self.jobs, self.schedules)]
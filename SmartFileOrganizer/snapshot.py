@@ -0,0 +1,166 @@
+# snapshot.py
+import os
+import gzip
+import json
+import hashlib
+from collections import namedtuple
+
+SNAPSHOT_FOLDER = "snapshots"
+SNAPSHOT_VERSION = 2     # bumped when the layout changes; older snapshots are ignored
+
+# Snapshot layout, one entry per directory:
+#   {dir_path: [mtime_ns, st_dev, empty, [subdirs], [symlinked dirs],
+#               [[name, size, mtime_ns, ctime_ns, ino], ...]]}
+
+
+class SnapshotStat(namedtuple("SnapshotStat", "st_size st_mtime_ns st_ctime_ns st_ino st_dev")):
+    """Stand-in for os.stat_result for files taken from a snapshot."""
+    __slots__ = ()
+
+    @property
+    def st_mtime(self):
+        return self.st_mtime_ns / 1e9
+
+    @property
+    def st_ctime(self):
+        return self.st_ctime_ns / 1e9
+
+
+def snapshot_path(root):
+    """Snapshot file used for a given scan root."""
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+    return os.path.join(SNAPSHOT_FOLDER, f"{digest}.json.gz")
+
+
+def load_snapshot(root):
+    path = snapshot_path(root)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("root") != os.path.abspath(root) or data.get("version") != SNAPSHOT_VERSION:
+            return {}
+        return data["dirs"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def save_snapshot(root, dirs):
+    os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+    path = snapshot_path(root)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as f:
+        json.dump({"version": SNAPSHOT_VERSION, "root": os.path.abspath(root), "dirs": dirs}, f,
+                  separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def iter_incremental(root, previous, current):
+    """
+    Walk like scanner.iter_scandir, but a directory whose mtime matches the
+    previous snapshot is not listed again: its files and subfolders are
+    replayed from the snapshot, so it costs one stat instead of a listing
+    plus a stat per file. `current` is filled with the new snapshot.
+
+    Besides the usual walker tuples this yields "added", "removed" and
+    "modified" file entries (only when a previous snapshot exists) and
+    "reused" for every directory taken from the snapshot.
+    Note that a file rewritten in place does not change its folder's mtime,
+    so such edits inside otherwise unchanged folders are not picked up.
+    Paths are yielded under os.path.abspath(root).
+    """
+    # snapshot keys are absolute, however the caller spelled the folder
+    root = os.path.abspath(root)
+    diff = bool(previous)
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            dir_st = os.stat(path)
+        except OSError as e:
+            yield ("error", path, str(e), None)
+            continue
+
+        old = previous.get(path)
+        if old is not None and old[0] == dir_st.st_mtime_ns:
+            current[path] = old
+            _, dev, empty, subdirs, links, files = old
+            for name in subdirs:
+                sub_path = os.path.join(path, name)
+                stack.append(sub_path)
+                yield ("dir", sub_path, name, None)
+            for name in links:
+                yield ("dir", os.path.join(path, name), name, None)
+            for name, size, mtime_ns, ctime_ns, ino in files:
+                yield ("file", os.path.join(path, name), name,
+                       SnapshotStat(size, mtime_ns, ctime_ns, ino, dev))
+            if empty and path != root:
+                yield ("empty", path, None, None)
+            yield ("reused", path, None, None)
+            yield ("dir_done", path, None, None)
+            continue
+
+        subdirs, links, files = [], [], []
+        has_entries = False
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    has_entries = True
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            stack.append(entry.path)
+                            yield ("dir", entry.path, entry.name, None)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            files.append([entry.name, st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino])
+                            yield ("file", entry.path, entry.name, st)
+                        elif entry.is_dir():
+                            links.append(entry.name)
+                            yield ("dir", entry.path, entry.name, None)
+                    except OSError as e:
+                        yield ("error", entry.path, str(e), None)
+        except OSError as e:
+            yield ("error", path, str(e), None)
+            continue
+
+        current[path] = [dir_st.st_mtime_ns, dir_st.st_dev, not has_entries, subdirs, links, files]
+        if diff:
+            yield from _diff_dir(path, old, subdirs, files, previous)
+        if not has_entries and path != root:
+            yield ("empty", path, None, None)
+        yield ("dir_done", path, None, None)
+
+
+def _diff_dir(path, old, subdirs, files, previous):
+    """Delta between a freshly listed directory and its snapshot entry."""
+    if old is None:
+        for rec in files:
+            yield ("added", os.path.join(path, rec[0]), rec[0], None)
+        return
+
+    old_files = {rec[0]: rec for rec in old[5]}
+    for rec in files:
+        prev = old_files.pop(rec[0], None)
+        if prev is None:
+            yield ("added", os.path.join(path, rec[0]), rec[0], None)
+        elif prev[1] != rec[1] or prev[2] != rec[2]:
+            yield ("modified", os.path.join(path, rec[0]), rec[0], None)
+    for name in old_files:
+        yield ("removed", os.path.join(path, name), name, None)
+
+    for name in set(old[3]).difference(subdirs):
+        yield from _removed_tree(os.path.join(path, name), previous)
+
+
+def _removed_tree(path, previous):
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        entry = previous.get(current)
+        if entry is None:
+            continue
+        for rec in entry[5]:
+            yield ("removed", os.path.join(current, rec[0]), rec[0], None)
+        stack.extend(os.path.join(current, name) for name in entry[3])
@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import compute_all, scan_directory  # noqa: E402
+
+
+def make_tree(root):
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_bytes(b"a" * 10)
+    (root / "sub" / "b.jpg").write_bytes(b"b" * 20)
+
+
+def test_scan_directory_keeps_name_and_path_by_default(tmp_path):
+    make_tree(tmp_path)
+
+    df = scan_directory(str(tmp_path))
+
+    assert sorted(df["Name"]) == ["a.txt", "b.jpg"]
+    assert sorted(df["Path"]) == sorted([str(tmp_path / "a.txt"), str(tmp_path / "sub" / "b.jpg")])
+    assert {"Size_MB", "Extension", "Created_At"} <= set(df.columns)
+
+
+def test_lean_frame_is_opt_in(tmp_path):
+    make_tree(tmp_path)
+
+    df = scan_directory(str(tmp_path), with_names=False, with_paths=False)
+
+    assert "Name" not in df and "Path" not in df
+    assert compute_all(df)["file_types"].sum() == 2
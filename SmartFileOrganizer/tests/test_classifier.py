@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import Classifier  # noqa: E402
+
+
+def test_regex_rules_keep_their_own_flags_and_backreferences():
+    classifier = Classifier(rules=[
+        {"category": "Repeated", "regex": r"(\w)\1.*"},
+        {"category": "Screenshots", "regex": r"(?i)screenshot.*"},
+        {"category": "Camera", "glob": "IMG_*"},
+    ])
+
+    assert classifier.classify("aab.txt") == "Repeated"
+    assert classifier.classify("Screenshot 1.png") == "Screenshots"
+    assert classifier.classify("img_0001.jpg") == "Camera"
+    assert classifier.classify("abc.pdf") == "Documents"
+
+
+def test_first_matching_name_rule_wins():
+    classifier = Classifier(rules=[
+        {"category": "First", "glob": "report*"},
+        {"category": "Second", "regex": r"report.*\.pdf"},
+    ])
+
+    assert classifier.classify("report-2024.pdf") == "First"
+
+
+@pytest.mark.parametrize("rule", [{"category": "Empty"}, {"glob": "*.tmp"}, {"category": "Bad", "regex": "("}])
+def test_invalid_rule_raises_value_error(rule):
+    with pytest.raises(ValueError):
+        Classifier(rules=[rule])
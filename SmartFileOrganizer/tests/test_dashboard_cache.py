@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_cache import AnalyticsCache, folder_fingerprint  # noqa: E402
+from scanner import FolderScanner  # noqa: E402
+
+
+def wait(job):
+    while job.status == "running":
+        time.sleep(0.01)
+    assert job.status == "done", job.error
+    return job
+
+
+def scan_table(folder):
+    fingerprint, scanned_at = folder_fingerprint(folder), time.time()
+    scanner = FolderScanner(folder)
+    scanner.scan(collect_table=True)
+    return scanner.file_table, fingerprint, scanned_at
+
+
+def test_scan_table_not_adopted_after_folder_changed(tmp_path):
+    for i in range(5):
+        (tmp_path / f"a{i}.txt").write_text("x")
+    table, fingerprint, scanned_at = scan_table(str(tmp_path))
+    for i in range(45):
+        (tmp_path / f"b{i}.txt").write_text("x")
+    os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 10**9))
+
+    cache = AnalyticsCache()
+    assert not cache.adopt(str(tmp_path), table, fingerprint, scanned_at)
+    assert len(wait(cache.get(str(tmp_path))).result["df"]) == 50
+
+
+def test_scan_table_not_adopted_after_ttl(tmp_path):
+    (tmp_path / "a.txt").write_text("x")
+    table, fingerprint, scanned_at = scan_table(str(tmp_path))
+    cache = AnalyticsCache(ttl=60)
+    assert not cache.adopt(str(tmp_path), table, fingerprint, scanned_at - 120)
+    assert cache.adopt(str(tmp_path), table, fingerprint, scanned_at)
+    assert len(wait(cache.get(str(tmp_path))).result["df"]) == 1
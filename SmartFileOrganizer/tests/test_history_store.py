@@ -0,0 +1,77 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_store  # noqa: E402
+from history_store import load_history_index, load_run, mark_undone, save_history  # noqa: E402
+
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    # history files are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def busy_threads():
+    # switch threads as often as possible so unlocked writers would interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def moves(run_id, n):
+    return [{"file": f"{run_id}-{i}.txt", "from": f"/in/{run_id}-{i}.txt",
+             "to": f"/out/{run_id}-{i}.txt"} for i in range(n)]
+
+
+def test_concurrent_writers_keep_index_offsets_valid(history_dir, busy_threads, monkeypatch):
+    # compact often so appends, undo markers and compactions interleave
+    monkeypatch.setattr(history_store, "COMPACT_MIN_BYTES", 4096)
+    monkeypatch.setattr(history_store, "MAX_RUNS", 50)
+
+    def writer(w):
+        for i in range(60):
+            run_id = f"w{w}-{i}"
+            save_history(run_id, moves(run_id, 1 + i % 5))
+            if i % 7 == 0:
+                mark_undone(run_id)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(writer, range(4)))
+
+    index = load_history_index()
+    assert 0 < len(index) <= 60 * 4
+    for run_id, entry in index.items():
+        run = load_run(run_id, index)
+        assert run["run_id"] == run_id
+        assert len(run["moves"]) == entry["moves"]
+
+
+def test_every_run_is_indexed_without_compaction(history_dir, busy_threads):
+    def writer(w):
+        for i in range(50):
+            save_history(f"w{w}-{i}", moves(f"w{w}-{i}", 3))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(writer, range(4)))
+
+    index = load_history_index()
+    assert len(index) == 200
+    assert all(load_run(run_id, index)["run_id"] == run_id for run_id in index)
+
+
+def test_load_run_with_stale_index_after_compaction(history_dir):
+    for i in range(5):
+        save_history(f"r{i}", moves(f"r{i}", 2))
+    stale = load_history_index()
+    history_store.compact_history(max_runs=2)
+
+    assert load_run("r4", stale)["run_id"] == "r4"
+    assert load_run("r0", stale) is None
@@ -0,0 +1,121 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import move_journal  # noqa: E402
+from move_journal import MoveJournal, interrupted_runs, resume_run, rollback_run  # noqa: E402
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    # journal and history files are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "Downloads"
+    (root / "Documents").mkdir(parents=True)
+    return root
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return path
+
+
+def journal_run(root, names, run_id="run1"):
+    """Journal moves of root/<name> -> root/Documents/<name> and leave the run interrupted."""
+    journal = MoveJournal(run_id, str(root))
+    items = [{"file": n, "src": str(root / n), "dst": str(root / "Documents" / n)} for n in names]
+    list(journal.guard(items))
+    journal.close()
+    return items
+
+
+def test_resume_runs_pending_moves(folder):
+    write(folder / "a.pdf", b"a")
+    write(folder / "b.pdf", b"b")
+    journal_run(folder, ["a.pdf", "b.pdf"])
+    os.rename(folder / "a.pdf", folder / "Documents" / "a.pdf")
+
+    events = list(resume_run("run1"))
+
+    assert events[-1]["moved"] == 2
+    assert (folder / "Documents" / "b.pdf").read_bytes() == b"b"
+    assert interrupted_runs() == []
+
+
+def test_resume_keeps_finished_move_when_new_file_has_same_name(folder):
+    write(folder / "report.pdf", b"original report")
+    journal_run(folder, ["report.pdf"])
+    os.rename(folder / "report.pdf", folder / "Documents" / "report.pdf")
+    write(folder / "report.pdf", b"new")
+
+    events = list(resume_run("run1"))
+
+    assert (folder / "Documents" / "report.pdf").read_bytes() == b"original report"
+    assert (folder / "report.pdf").read_bytes() == b"new"
+    assert [e["status"] for e in events] == ["skipped", "done"]
+
+
+def test_rollback_restores_moved_files(folder):
+    write(folder / "a.pdf", b"a")
+    journal_run(folder, ["a.pdf"])
+    os.rename(folder / "a.pdf", folder / "Documents" / "a.pdf")
+
+    events = list(rollback_run("run1"))
+
+    assert events[-1] == {"status": "done", "restored": 1, "errors": 0, "run_id": "run1"}
+    assert (folder / "a.pdf").read_bytes() == b"a"
+    assert interrupted_runs() == []
+
+
+def test_rollback_keeps_both_files_when_new_file_has_same_name(folder):
+    write(folder / "report.pdf", b"original report")
+    journal_run(folder, ["report.pdf"])
+    os.rename(folder / "report.pdf", folder / "Documents" / "report.pdf")
+    write(folder / "report.pdf", b"new")
+
+    events = list(rollback_run("run1"))
+
+    assert (folder / "Documents" / "report.pdf").read_bytes() == b"original report"
+    assert (folder / "report.pdf").read_bytes() == b"new"
+    assert events[-1]["errors"] == 1
+    # kept so the rollback can be retried
+    assert [r["run_id"] for r in interrupted_runs()] == ["run1"]
+
+
+def test_resume_redoes_cut_short_cross_device_copy(folder, monkeypatch):
+    write(folder / "big.iso", b"x" * 100)
+    journal_run(folder, ["big.iso"])
+    write(folder / "Documents" / "big.iso", b"x" * 10)
+    dst = str(folder / "Documents" / "big.iso")
+    lstat = os.lstat
+
+    def other_device(path):
+        st = lstat(path)
+        if path == dst:
+            # pretend the destination is on another filesystem
+            return os.stat_result((st.st_mode, st.st_ino, st.st_dev + 1) + tuple(st)[3:])
+        return st
+
+    monkeypatch.setattr(move_journal.os, "lstat", other_device)
+    list(resume_run("run1"))
+
+    assert (folder / "Documents" / "big.iso").read_bytes() == b"x" * 100
+    assert not (folder / "big.iso").exists()
+
+
+def test_live_run_is_not_interrupted(folder):
+    write(folder / "a.pdf", b"a")
+    journal = MoveJournal("live", str(folder))
+    list(journal.guard([{"file": "a.pdf", "src": str(folder / "a.pdf"),
+                         "dst": str(folder / "Documents" / "a.pdf")}]))
+    try:
+        assert interrupted_runs() == []
+        assert [e["status"] for e in resume_run("live")] == ["warning"]
+        assert [e["status"] for e in rollback_run("live")] == ["warning"]
+        assert (folder / "a.pdf").exists()
+    finally:
+        journal.commit()
+    assert not os.path.exists(journal.path)
@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mover import copy_move  # noqa: E402
+
+
+def test_copy_move_copies_file_and_removes_source(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"x" * 1000)
+
+    assert copy_move(str(src), str(tmp_path / "b.bin")) == 1000
+    assert (tmp_path / "b.bin").read_bytes() == b"x" * 1000
+    assert not src.exists()
+
+
+def test_copy_move_keeps_symlink(tmp_path):
+    (tmp_path / "target.txt").write_text("data")
+    link = tmp_path / "link.txt"
+    os.symlink("target.txt", link)
+    dst = tmp_path / "moved" / "link.txt"
+    dst.parent.mkdir()
+
+    assert copy_move(str(link), str(dst)) == 0
+    assert os.path.islink(dst) and os.readlink(dst) == "target.txt"
+    assert not os.path.lexists(link)
+    assert (tmp_path / "target.txt").read_text() == "data"
@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_export import cleanup_exports, export_format, unique_export_path  # noqa: E402
+
+
+def test_unique_export_path_keeps_extensions(tmp_path):
+    first = unique_export_path(str(tmp_path), "scan_files.csv.gz")
+    second = unique_export_path(str(tmp_path), "scan_files.csv.gz")
+
+    assert first != second
+    name = os.path.basename(first)
+    assert name.startswith("scan_files-") and name.endswith(".csv.gz")
+    assert export_format(first) == "csv"
+
+
+def test_cleanup_removes_only_old_exports(tmp_path):
+    old = unique_export_path(str(tmp_path), "scan_files.jsonl.gz")
+    kept = unique_export_path(str(tmp_path), "scan_results.json.gz")
+    fresh = unique_export_path(str(tmp_path), "scan_files.csv.gz")
+    other = str(tmp_path / "logo.png")
+    for path in (old, kept, fresh, other):
+        open(path, "wb").close()
+    past = time.time() - 2 * 3600
+    for path in (old, kept, other):
+        os.utime(path, (past, past))
+
+    assert cleanup_exports(str(tmp_path), max_age=3600, keep=[kept]) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in (kept, fresh, other))
@@ -0,0 +1,20 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import CronSchedule, JobSchedule  # noqa: E402
+
+
+def test_cron_that_never_fires_is_rejected():
+    with pytest.raises(ValueError, match="never fires"):
+        CronSchedule("0 0 30 2 *")
+    with pytest.raises(ValueError):
+        JobSchedule({"name": "feb30", "folder": ".", "cron": "0 0 30 2 *"})
+
+
+def test_leap_day_cron_is_accepted():
+    assert CronSchedule("0 0 29 2 *").next_after(datetime(2026, 3, 1)) == datetime(2028, 2, 29)
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import FolderScanner  # noqa: E402
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    # snapshots are stored relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "d"
+    (root / "sub").mkdir(parents=True)
+    for i in range(3):
+        (root / f"a{i}.txt").write_text("x" * i)
+        (root / "sub" / f"b{i}.jpg").write_text("y")
+    return root
+
+
+def test_incremental_scan_with_table_reuses_snapshot(tree):
+    first = FolderScanner(str(tree)).scan(incremental=True, collect_table=True)
+    scanner = FolderScanner(str(tree))
+    second = scanner.scan(incremental=True, collect_table=True)
+
+    assert second["delta"]["dirs_reused"] == 2
+    assert second["total_files"] == first["total_files"] == 6
+    df = scanner.file_table.to_dataframe()
+    assert len(df) == 6
+    assert df["Created_At"].notna().all()
+
+
+def test_incremental_scan_matches_other_spellings_of_root(tree, tmp_path):
+    FolderScanner("d").scan(incremental=True)
+    for spelling in (str(tree), str(tree) + os.sep, os.path.join(".", "d")):
+        delta = FolderScanner(spelling).scan(incremental=True)["delta"]
+        assert delta["added"] == [] and delta["removed"] == []
+        assert delta["dirs_reused"] == 2
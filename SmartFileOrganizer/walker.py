@@ -0,0 +1,174 @@
+# walker.py
+import os
+import queue
+import threading
+from collections import deque
+
+DEFAULT_WORKERS = 8
+_DONE = object()
+
+
+def list_entries(path, is_root=False):
+    """
+    List one directory with os.scandir.
+    Returns (entries, subdirs): entries are scanner-style (kind, path, name, stat)
+    tuples ending with "dir_done", subdirs are the real folders to descend into.
+    """
+    entries = []
+    subdirs = []
+    has_entries = False
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                has_entries = True
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        entries.append(("dir", entry.path, entry.name, None))
+                    elif entry.is_file():
+                        entries.append(("file", entry.path, entry.name, entry.stat()))
+                    elif entry.is_dir():
+                        # symlinked folder: counted but not followed
+                        entries.append(("dir", entry.path, entry.name, None))
+                except OSError as e:
+                    entries.append(("error", entry.path, str(e), None))
+    except OSError as e:
+        return [("error", path, str(e), None)], []
+
+    if not has_entries and not is_root:
+        entries.append(("empty", path, None, None))
+    entries.append(("dir_done", path, None, None))
+    return entries, subdirs
+
+
+class WorkStealingWalker:
+    """
+    Walk one or more roots on a pool of threads. Every worker keeps its own
+    deque of folders (LIFO, depth-first) and steals from the other end of a
+    busy worker's deque when it runs dry, so wide and deep trees both spread
+    out. Listing is I/O bound, which is what keeps network shares busy.
+    """
+
+    def __init__(self, roots, workers=DEFAULT_WORKERS):
+        if isinstance(roots, (str, os.PathLike)):
+            roots = [roots]
+        self.roots = [os.fspath(r) for r in roots]
+        self.workers = max(1, workers)
+        self._deques = [deque() for _ in range(self.workers)]
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._stop = threading.Event()
+        for idx, root in enumerate(self.roots):
+            self._push(idx % self.workers, root)
+
+    def _push(self, idx, path):
+        with self._cond:
+            self._pending += 1
+            self._deques[idx].append(path)
+            self._cond.notify()
+
+    def _next(self, idx):
+        own = self._deques[idx]
+        while not self._stop.is_set():
+            try:
+                return own.pop()
+            except IndexError:
+                pass
+            for offset in range(1, self.workers):
+                try:
+                    return self._deques[(idx + offset) % self.workers].popleft()
+                except IndexError:
+                    continue
+            with self._cond:
+                if self._pending == 0:
+                    return None
+                self._cond.wait(0.05)
+        return None
+
+    def _finish_one(self):
+        with self._cond:
+            self._pending -= 1
+            if self._pending == 0:
+                self._cond.notify_all()
+
+    def _run(self, idx, visit):
+        roots = set(self.roots)
+        while True:
+            path = self._next(idx)
+            if path is None:
+                return
+            try:
+                entries, subdirs = list_entries(path, is_root=path in roots)
+                for sub in subdirs:
+                    self._push(idx, sub)
+                visit(idx, entries)
+            finally:
+                self._finish_one()
+
+    def _start(self, visit):
+        threads = [
+            threading.Thread(target=self._run, args=(idx, visit), daemon=True)
+            for idx in range(self.workers)
+        ]
+        for t in threads:
+            t.start()
+        return threads
+
+    def walk(self, max_buffered=1024):
+        """Yield entries in the calling thread as workers list folders."""
+        out = queue.Queue(maxsize=max_buffered)
+
+        def visit(idx, entries):
+            while not self._stop.is_set():
+                try:
+                    out.put(entries, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        threads = self._start(visit)
+
+        def finish():
+            for t in threads:
+                t.join()
+            out.put(_DONE)
+
+        threading.Thread(target=finish, daemon=True).start()
+        try:
+            while True:
+                batch = out.get()
+                if batch is _DONE:
+                    return
+                yield from batch
+        finally:
+            # consumer stopped early (or finished): let the workers exit
+            self._stop.set()
+
+    def reduce(self, make_accumulator):
+        """
+        Fold entries into one accumulator per worker, then merge them.
+        Accumulators need add(kind, path, name, stat) and merge(other).
+        """
+        accs = [make_accumulator() for _ in range(self.workers)]
+
+        def visit(idx, entries):
+            acc = accs[idx]
+            for entry in entries:
+                acc.add(*entry)
+
+        for t in self._start(visit):
+            t.join()
+        result = accs[0]
+        for acc in accs[1:]:
+            result.merge(acc)
+        return result
+
+
+def parallel_walk(roots, workers=DEFAULT_WORKERS):
+    """Yield scanner-style tuples for every entry under the given roots."""
+    return WorkStealingWalker(roots, workers).walk()
+
+
+def parallel_reduce(roots, make_accumulator, workers=DEFAULT_WORKERS):
+    """Aggregate every entry under the given roots with per-worker accumulators."""
+    return WorkStealingWalker(roots, workers).reduce(make_accumulator)
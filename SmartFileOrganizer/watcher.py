@@ -0,0 +1,174 @@
+# watcher.py
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+from file_organizer import organize_directory, organize_files
+
+DEBOUNCE = 2.0         # seconds without new files before a batch is organized
+MAX_DELAY = 30.0       # a batch never waits longer than this during a burst
+POLL_INTERVAL = 5.0    # listing interval of the polling fallback
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")    # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """
+    New files in one folder from Linux inotify, through ctypes (no extra
+    dependency). A file is reported once it is closed after writing or moved
+    in, so half-written files are never picked up.
+    """
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"cannot watch {folder}")
+        self.folder = folder
+        self.overflowed = False
+
+    def poll(self, timeout):
+        """Names of files that arrived, waiting at most timeout seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped: the caller has to list the folder
+                self.overflowed = True
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                raise FileNotFoundError(errno.ENOENT, "watched folder is gone", self.folder)
+            elif name and not mask & IN_ISDIR:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Fallback for systems without inotify: lists the folder every interval and
+    reports files that appeared, once their size and mtime stopped changing.
+    """
+
+    def __init__(self, folder, interval=POLL_INTERVAL):
+        self.folder = folder
+        self.interval = interval
+        self.overflowed = False
+        self._seen = self._list()      # files present at start are not "new"
+        self._growing = {}
+        self._next = time.monotonic() + interval
+
+    def _list(self):
+        files = {}
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        files[entry.name] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+        return files
+
+    def poll(self, timeout):
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, wait))
+        self._next = time.monotonic() + self.interval
+        current = self._list()
+        names = []
+        growing = {}
+        for name, sig in current.items():
+            if self._seen.get(name) == sig:
+                continue
+            if self._growing.get(name) == sig:
+                names.append(name)
+                self._seen[name] = sig
+            else:
+                growing[name] = sig
+        self._growing = growing
+        # forget files that were moved away, so a new file with the same name counts
+        self._seen = {name: sig for name, sig in self._seen.items() if name in current}
+        return names
+
+    def close(self):
+        pass
+
+
+def make_watcher(folder):
+    """inotify where available, else polling."""
+    try:
+        return InotifyWatcher(folder)
+    except (OSError, AttributeError):
+        return PollingWatcher(folder)
+
+
+def watch_folder(folder, stop_event=None, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+    """
+    Daemon mode: organize files as they arrive in folder instead of on a
+    timetable. Files already there are organized once at start; after that,
+    bursts of new files are collected until debounce seconds pass without a
+    new one (or max_delay is reached) and only those files are organized.
+    Runs until stop_event is set, yielding organize_directory events plus
+    {"status": "batch", "files": n} before each batch.
+    """
+    folder = os.path.abspath(folder)
+    watcher = make_watcher(folder)
+    try:
+        yield {"status": "watching", "folder": folder, "mode": type(watcher).__name__}
+        yield from organize_directory(folder)
+        pending = {}
+        first = None
+        while stop_event is None or not stop_event.is_set():
+            names = watcher.poll(debounce)
+            now = time.monotonic()
+            for name in names:
+                pending.setdefault(name, now)
+                first = first or now
+            if watcher.overflowed:
+                watcher.overflowed = False
+                pending, first = {}, None
+                yield from organize_directory(folder)
+                continue
+            if pending and (not names or now - first >= max_delay):
+                batch = list(pending)
+                pending, first = {}, None
+                yield {"status": "batch", "files": len(batch)}
+                yield from organize_files(folder, batch)
+    finally:
+        watcher.close()